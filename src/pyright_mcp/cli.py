@@ -2,11 +2,20 @@ from __future__ import annotations
 
 import json
 import sys
-from typing import Optional, cast
+from typing import TYPE_CHECKING, Optional, cast
 
 import click
 
-from .runner import FailOn, PyrightCheckParams, PyrightRunner
+if TYPE_CHECKING:
+    # The runner (subprocess, pathlib, thread pools, ...) is imported on first use, so
+    # `pyright-mcp --help` and usage errors skip it.
+    from .runner import CheckResult, FailOn, PyrightCheckParams
+
+try:
+    # Optional speedup: orjson serializes large reports several times faster than json.dumps.
+    import orjson  # pyright: ignore[reportMissingImports]
+except ImportError:
+    orjson = None
 
 
 @click.command(context_settings={"help_option_names": ["-h", "--help"]})
@@ -42,6 +51,12 @@ from .runner import FailOn, PyrightCheckParams, PyrightRunner
     show_default=True,
     help="Timeout in seconds for Pyright subprocess",
 )
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Parallel Pyright processes for large --include sets [default: CPU count]",
+)
 @click.option(
     "--fail-on-severity",
     type=click.Choice(["none", "information", "warning", "error"], case_sensitive=False),
@@ -56,6 +71,7 @@ def main(
     exclude_patterns: tuple[str, ...],
     extra_args: tuple[str, ...],
     timeout_sec: int,
+    workers: Optional[int],
     fail_on_severity: str,
 ) -> None:
     """
@@ -63,12 +79,41 @@ def main(
 
     Exit code: 0 if ok=true, 1 if ok=false (threshold or infrastructure failure).
     """
-    runner = PyrightRunner()
+    params = _build_params(
+        target=target,
+        cwd=cwd,
+        include_patterns=include_patterns,
+        exclude_patterns=exclude_patterns,
+        extra_args=extra_args,
+        timeout_sec=timeout_sec,
+        workers=workers,
+        fail_on_severity=fail_on_severity,
+    )
+    from .runner import PyrightRunner
+
+    result = PyrightRunner().run_check(params)
+    sys.stdout.buffer.write(_render_result(result) + b"\n")
+    sys.stdout.flush()
+    sys.exit(0 if result.get("ok") else 1)
+
+
+def _build_params(
+    target: str,
+    cwd: Optional[str],
+    include_patterns: tuple[str, ...],
+    exclude_patterns: tuple[str, ...],
+    extra_args: tuple[str, ...],
+    timeout_sec: int,
+    workers: Optional[int],
+    fail_on_severity: str,
+) -> PyrightCheckParams:
+    """Map parsed CLI options to runner params (shared with the daemon's CLI forwarding)."""
+    from .runner import PyrightCheckParams
 
     fail_choice = fail_on_severity.lower()
-    fail_val = cast(FailOn, fail_choice)
+    fail_val = cast("FailOn", fail_choice)
 
-    params = PyrightCheckParams(
+    return PyrightCheckParams(
         target=target,
         cwd=cwd,
         include=list(include_patterns) if include_patterns else None,
@@ -76,12 +121,15 @@ def main(
         extra_args=list(extra_args) if extra_args else None,
         timeout_sec=timeout_sec,
         fail_on_severity=fail_val,
+        workers=workers,
     )
 
-    result = runner.run_check(params)
-    # Deterministic JSON output
-    click.echo(json.dumps(result, ensure_ascii=False, sort_keys=True))
-    sys.exit(0 if result.get("ok") else 1)
+
+def _render_result(result: CheckResult) -> bytes:
+    # Deterministic UTF-8 JSON with sorted keys; orjson (the `fast` extra) writes it compact
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(result, ensure_ascii=False, sort_keys=True).encode("utf-8")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+# Thin client for the pyright-mcp daemon. Deliberately limited to stdlib modules that are
+# already loaded at interpreter start-up (plus json and hashlib), so `pyright-mcp-client`
+# skips the Click/Pydantic/runner import cost paid by `pyright-mcp`.
+import hashlib
+import json
+import os
+import socket
+import sys
+import time
+from typing import Any, Optional, cast
+
+from . import __version__
+
+# How long a client waits for a freshly spawned daemon to accept connections.
+_SPAWN_WAIT_SEC = 10.0
+
+
+def daemon_dir() -> str:
+    """
+    Directory holding the daemon socket, PID file and log.
+
+    Uses $XDG_CACHE_HOME/pyright-mcp when set, otherwise ~/.cache/pyright-mcp.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pyright-mcp")
+
+
+def env_tag() -> str:
+    """
+    Short hash naming the daemon for this environment.
+
+    A daemon analyzes with the PATH/VIRTUAL_ENV it was started with (the inputs of
+    pyright_mcp.runner._env_cache_key) and runs this interpreter, so each combination
+    gets its own socket, PID file and log. Kept short: Unix socket paths are limited to
+    about 100 bytes.
+    """
+    key = "\0".join((os.environ.get("PATH", ""), os.environ.get("VIRTUAL_ENV", ""), sys.executable))
+    return hashlib.sha256(key.encode("utf-8", "surrogateescape")).hexdigest()[:12]
+
+
+def socket_path() -> str:
+    return os.path.join(daemon_dir(), f"{env_tag()}.sock")
+
+
+def pid_path() -> str:
+    return os.path.join(daemon_dir(), f"{env_tag()}.pid")
+
+
+def log_path() -> str:
+    return os.path.join(daemon_dir(), f"{env_tag()}.log")
+
+
+def lock_path() -> str:
+    """File a daemon holds an exclusive flock on from start-up until it exits."""
+    return os.path.join(daemon_dir(), f"{env_tag()}.lock")
+
+
+def request(payload: dict[str, Any], timeout: Optional[float]) -> dict[str, Any]:
+    """
+    Send one newline-delimited JSON request to the daemon and return its reply.
+
+    Raises OSError (including socket.timeout) or ValueError on transport/protocol failures.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path())
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    reply = json.loads(line)
+    if not isinstance(reply, dict):
+        raise ValueError("Malformed daemon reply")
+    return cast(dict[str, Any], reply)
+
+
+def ping() -> Optional[dict[str, Any]]:
+    try:
+        return request({"op": "ping"}, timeout=2.0)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_stale_files() -> None:
+    """
+    Remove a leftover socket/PID file whose daemon no longer answers.
+
+    Only safe while holding the daemon lock (see pyright_mcp.daemon.serve): another
+    client may have just spawned a daemon that is about to bind the socket.
+    """
+    for p in (socket_path(), pid_path()):
+        try:
+            os.unlink(p)
+        except OSError:
+            pass
+
+
+def stop_daemon(wait_sec: float = 5.0) -> bool:
+    """
+    Ask a running daemon to exit. Returns True if a daemon was running and stopped.
+    """
+    try:
+        request({"op": "stop"}, timeout=2.0)
+    except (OSError, ValueError):
+        return False
+    deadline = time.monotonic() + wait_sec
+    while time.monotonic() < deadline:
+        if ping() is None:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _spawn_daemon() -> None:
+    os.makedirs(daemon_dir(), exist_ok=True)
+    # The daemon's stdout/stderr go to a log file; the socket is the only RPC channel.
+    os.posix_spawn(
+        sys.executable,
+        [sys.executable, "-m", "pyright_mcp.daemon"],
+        os.environ,
+        file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 1, log_path(), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644),
+            (os.POSIX_SPAWN_DUP2, 1, 2),
+        ],
+        setsid=True,
+    )
+
+
+def ensure_daemon() -> bool:
+    """
+    Make sure a daemon of the same pyright-mcp version is listening.
+
+    Spawns one if none answers or on a version mismatch; the spawned daemon clears stale
+    files itself, and exits if another one already holds the daemon lock. Returns False
+    if no daemon could be reached within the spawn window.
+    """
+    info = ping()
+    if info is not None and info.get("version") == __version__:
+        return True
+    if info is not None:
+        stop_daemon()
+    try:
+        _spawn_daemon()
+    except OSError:
+        return False
+    deadline = time.monotonic() + _SPAWN_WAIT_SEC
+    while time.monotonic() < deadline:
+        info = ping()
+        if info is not None and info.get("version") == __version__:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _exec_full_cli(argv: list[str]) -> None:
+    os.execv(sys.executable, [sys.executable, "-m", "pyright_mcp.cli", *argv])
+
+
+def main() -> None:
+    """
+    Forward argv to the pyright-mcp daemon and print its JSON reply.
+
+    Accepts the same arguments as `pyright-mcp`. Help requests, argument errors and any
+    daemon failure are handed to the full `pyright-mcp` CLI instead.
+    """
+    argv = sys.argv[1:]
+    if "-h" in argv or "--help" in argv or not hasattr(socket, "AF_UNIX") or not ensure_daemon():
+        _exec_full_cli(argv)
+        return
+    try:
+        reply = request({"op": "cli", "argv": argv, "cwd": os.getcwd()}, timeout=None)
+    except (OSError, ValueError):
+        reply = {}
+    out = reply.get("stdout")
+    code = reply.get("exit_code")
+    if not isinstance(out, str) or not isinstance(code, int):
+        _exec_full_cli(argv)
+        return
+    sys.stdout.write(out)
+    sys.stdout.flush()
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,34 @@
 from __future__ import annotations
 
-import re
+import os
 from pathlib import Path
 from typing import Optional
 
 from .models import FindConfigResultModel
 
 
+# Checked at every ancestor directory; anything larger is not a plausible pyproject.toml.
+_MAX_PYPROJECT_BYTES = 1 << 20
+_PYRIGHT_HEADER = b"[tool.pyright]"
+
+
 def _has_pyright_section_in_pyproject(pyproject_path: Path) -> bool:
     try:
-        text = pyproject_path.read_text(encoding="utf-8", errors="replace")
+        if os.path.getsize(pyproject_path) > _MAX_PYPROJECT_BYTES:
+            return False
+        with open(pyproject_path, "rb") as f:
+            data = f.read()
     except OSError:
         return False
-    # Minimal check: look for a [tool.pyright] section header
-    return re.search(r"(?m)^\s*\[tool\.pyright\]\s*$", text) is not None
+    # Minimal check: a [tool.pyright] header preceded only by whitespace on its line.
+    # Raw bytes substring search; no decode and no regex.
+    i = data.find(_PYRIGHT_HEADER)
+    while i != -1:
+        line_start = data.rfind(b"\n", 0, i) + 1
+        if not data[line_start:i].strip():
+            return True
+        i = data.find(_PYRIGHT_HEADER, i + 1)
+    return False
 
 
 def find_pyright_config(start_dir: str | Path | None) -> FindConfigResultModel:
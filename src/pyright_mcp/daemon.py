@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from dataclasses import asdict, replace
+from typing import Any, Optional, cast
+
+import click
+
+from . import __version__
+from .cli import _build_params, _render_result, main as cli_main
+from .client import (
+    clear_stale_files,
+    daemon_dir,
+    ensure_daemon,
+    lock_path,
+    pid_path,
+    ping,
+    request,
+    socket_path,
+    stop_daemon,
+)
+from .runner import CheckResult, PyrightCheckParams, PyrightRunner
+from .watch import close_all as close_watch_sessions
+
+DAEMON_ENV = "PYRIGHT_MCP_DAEMON"
+
+# Extra time granted on top of params.timeout_sec before a client gives up on a reply.
+_REPLY_GRACE_SEC = 30.0
+
+# How long a starting daemon waits for the lock held by a daemon that is shutting down.
+_LOCK_WAIT_SEC = 5.0
+
+# The daemon's working directory is shared by all handler threads; hold this lock while
+# a CLI request's relative paths are resolved against the client's working directory.
+_CHDIR_LOCK = threading.Lock()
+
+
+def run_check_via_daemon(params: PyrightCheckParams) -> Optional[CheckResult]:
+    """
+    Run a check through the daemon, starting it if needed.
+
+    Returns None on any daemon failure so callers can fall back to running in-process.
+    """
+    if not ensure_daemon():
+        return None
+    # The daemon has its own working directory: send absolute paths only.
+    abs_params = replace(
+        params,
+        target=os.path.abspath(params.target),
+        cwd=os.path.abspath(params.cwd) if params.cwd else None,
+    )
+    try:
+        reply = request(
+            {"op": "check", "params": asdict(abs_params)},
+            timeout=params.timeout_sec + _REPLY_GRACE_SEC,
+        )
+    except (OSError, ValueError):
+        return None
+    result = reply.get("result")
+    if not isinstance(result, dict):
+        return None
+    return cast(CheckResult, result)
+
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server; one request per connection, each on its own thread."""
+
+    daemon_threads = True
+    # handle_request() wakes up at this interval so a stop request is noticed promptly.
+    timeout = 0.5
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, _DaemonHandler)
+        # Watch sessions follow PYRIGHT_MCP_WATCH like any other runner (off by default)
+        self.runner = PyrightRunner(use_daemon=False)
+        self.stopping = False
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        try:
+            req = json.loads(line)
+            reply = self._dispatch(cast(dict[str, Any], req))
+        except Exception as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _dispatch(self, req: dict[str, Any]) -> dict[str, Any]:
+        server = cast(_DaemonServer, self.server)
+        op = req.get("op")
+        if op == "ping":
+            return {"version": __version__, "pid": os.getpid()}
+        if op == "stop":
+            server.stopping = True
+            return {"stopping": True}
+        if op == "check":
+            params = PyrightCheckParams(**cast(dict[str, Any], req.get("params") or {}))
+            return {"result": server.runner.run_check(params)}
+        if op == "cli":
+            return self._run_cli(server, [str(a) for a in req.get("argv") or []], str(req.get("cwd") or "."))
+        return {"error": f"Unknown op: {op!r}"}
+
+    def _run_cli(self, server: _DaemonServer, argv: list[str], cwd: str) -> dict[str, Any]:
+        """Handle a forwarded `pyright-mcp` command line; see pyright_mcp.client."""
+        with _CHDIR_LOCK:
+            prev = os.getcwd()
+            os.chdir(cwd)
+            try:
+                ctx = cli_main.make_context("pyright-mcp", argv)
+                params = _build_params(**ctx.params)
+                params = replace(
+                    params,
+                    target=os.path.abspath(params.target),
+                    cwd=os.path.abspath(params.cwd) if params.cwd else None,
+                )
+            except (click.ClickException, click.exceptions.Exit, click.exceptions.Abort):
+                # Let the client re-run the full CLI so usage errors are reported normally.
+                return {"fallback": True}
+            finally:
+                os.chdir(prev)
+        result = server.runner.run_check(params)
+        return {"stdout": _render_result(result).decode("utf-8") + "\n", "exit_code": 0 if result.get("ok") else 1}
+
+
+def _exit_on_signal(signum: int, frame: Any) -> None:
+    # Unwind through serve()'s cleanup (socket, PID file, watch sessions)
+    raise SystemExit(128 + signum)
+
+
+def _acquire_lock(fd: int) -> bool:
+    """
+    Take the daemon lock on fd. Returns False if a live daemon holds it.
+
+    The holder is either serving (it answers a ping once bound) or shutting down, in
+    which case the lock is released within a short wait.
+    """
+    deadline = time.monotonic() + _LOCK_WAIT_SEC
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            pass
+        if ping() is not None or time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+
+
+def serve() -> None:
+    """Bind the daemon socket and serve requests until asked to stop."""
+    os.makedirs(daemon_dir(), exist_ok=True)
+    sock = socket_path()
+    # Held until exit, so only one daemon per environment gets past here, and socket/PID
+    # files found while holding it belong to a dead daemon
+    lock_fd = os.open(lock_path(), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if not _acquire_lock(lock_fd):
+            print(f"pyright-mcp daemon already running for {sock}", file=sys.stderr)
+            return
+        clear_stale_files()
+        server = _DaemonServer(sock)
+        with open(pid_path(), "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        for sig in (signal.SIGTERM, signal.SIGHUP):
+            signal.signal(sig, _exit_on_signal)
+        try:
+            while not server.stopping:
+                server.handle_request()
+        finally:
+            clear_stale_files()
+            server.server_close()
+            close_watch_sessions()
+    finally:
+        os.close(lock_fd)
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option("--stop", is_flag=True, default=False, help="Stop a running daemon and exit")
+def main(stop: bool) -> None:
+    """
+    Run the pyright-mcp daemon in the foreground.
+
+    Clients opt in with PYRIGHT_MCP_DAEMON=1; the daemon is spawned on demand.
+    """
+    if stop:
+        sys.exit(0 if stop_daemon() else 1)
+    serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import functools
 import json
+import operator
 import re
+import selectors
 import shutil
+import socket
 import subprocess
 import os
 import sys
-from dataclasses import dataclass
-from fnmatch import fnmatch
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import translate
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, TypedDict, cast
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Tuple, TypedDict, cast
+
+try:
+    # Optional speedup: orjson parses Pyright's report straight from bytes, several times faster.
+    from orjson import loads as _json_loads  # pyright: ignore[reportMissingImports]
+except ImportError:
+    _json_loads = json.loads
 
 Severity = Literal["information", "warning", "error"]
 FailOn = Literal["none", "information", "warning", "error"]
@@ -82,9 +94,16 @@ class PyrightCheckParams:
     extra_args: Optional[List[str]] = None
     timeout_sec: int = 60
     fail_on_severity: FailOn = "none"
+    # Parallel pyright processes for explicit include sets; None means os.cpu_count().
+    workers: Optional[int] = None
+
 
+# Sharding only pays off once per-process startup is amortized over enough files.
+_MIN_SHARD_PATHS = 8
+_MIN_PATHS_PER_SHARD = 4
 
-def parse_pyright_json(text: str) -> Optional[dict[str, Any]]:
+
+def parse_pyright_json(text: str | bytes) -> Optional[dict[str, Any]]:
     """
     Attempt to parse Pyright JSON output; return None on failure.
 
@@ -103,7 +122,7 @@ def parse_pyright_json(text: str) -> Optional[dict[str, Any]]:
       }
     """
     try:
-        obj = json.loads(text)
+        obj = _json_loads(text)
     except Exception:
         return None
     if not isinstance(obj, dict):
@@ -113,15 +132,23 @@ def parse_pyright_json(text: str) -> Optional[dict[str, Any]]:
     return obj
 
 
+# pyright --version outputs like: "pyright 1.1.405"
+_VERSION_RE = re.compile(r"\b(\d+\.\d+\.\d+)\b")
+_SEMVER_FULL_RE = re.compile(r"^\d+\.\d+\.\d+$")
+
+
 def _parse_version_string(s: str) -> str:
-    # pyright --version outputs like: "pyright 1.1.405"
-    m = re.search(r"\b(\d+\.\d+\.\d+)\b", s)
+    m = _VERSION_RE.search(s)
     return m.group(1) if m else s.strip()
 
 
 def _supports_outputjson(version: str) -> bool:
     # --outputjson has existed for years; conservatively assume True if a semver appears.
-    return bool(re.match(r"^\d+\.\d+\.\d+$", version))
+    return bool(_SEMVER_FULL_RE.match(version))
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
 
 
 def _detect_venv_path() -> str:
@@ -152,18 +179,16 @@ def _detect_venv_path() -> str:
         return str(Path.cwd())
 
 
-def _build_pyright_argv() -> Tuple[List[str], str]:
-    """
-    Resolve how to invoke pyright.
+def _env_cache_key() -> Tuple[str, str]:
+    # Which pyright gets picked up depends on these; a change invalidates the caches below.
+    return os.environ.get("PATH", ""), os.environ.get("VIRTUAL_ENV", "")
 
-    Returns:
-      (argv_prefix, display_exe)
-      - argv_prefix: e.g. ["/path/to/pyright"] or [sys.executable, "-m", "pyright"]
-      - display_exe: human-readable command identifier used in VersionInfo.executable_path
-    """
+
+@functools.lru_cache(maxsize=1)
+def _resolve_pyright_argv(env_key: Tuple[str, str]) -> Tuple[Tuple[str, ...], str]:
     exe = shutil.which("pyright")
     if exe:
-        return [exe], exe
+        return (exe,), exe
     # Fallback to Python module invocation if available
     try:
         cp = subprocess.run(
@@ -175,14 +200,33 @@ def _build_pyright_argv() -> Tuple[List[str], str]:
             encoding="utf-8",
             errors="replace",
             timeout=10,
+            # With an absolute executable and no cwd, CPython launches via posix_spawn
+            close_fds=False,
         )
         if cp.returncode == 0 and cp.stdout:
-            return [sys.executable, "-m", "pyright"], f"{sys.executable} -m pyright"
+            return (sys.executable, "-m", "pyright"), f"{sys.executable} -m pyright"
     except Exception:
         pass
-    return [], ""
+    return (), ""
 
-def get_pyright_version() -> VersionInfo:
+
+def _build_pyright_argv() -> Tuple[List[str], str]:
+    """
+    Resolve how to invoke pyright (cached per PATH/VIRTUAL_ENV; failures are not cached).
+
+    Returns:
+      (argv_prefix, display_exe)
+      - argv_prefix: e.g. ["/path/to/pyright"] or [sys.executable, "-m", "pyright"]
+      - display_exe: human-readable command identifier used in VersionInfo.executable_path
+    """
+    argv, display = _resolve_pyright_argv(_env_cache_key())
+    if not argv:
+        _resolve_pyright_argv.cache_clear()
+    return list(argv), display
+
+
+@functools.lru_cache(maxsize=1)
+def _probe_pyright_version(env_key: Tuple[str, str]) -> VersionInfo:
     argv, display = _build_pyright_argv()
     if not argv:
         return VersionInfo(version="", executable_path="", supports_outputjson=False)
@@ -196,6 +240,8 @@ def get_pyright_version() -> VersionInfo:
             encoding="utf-8",
             errors="replace",
             timeout=10,
+            # With an absolute executable and no cwd, CPython launches via posix_spawn
+            close_fds=False,
         )
         ver = _parse_version_string(cp.stdout or "")
         return VersionInfo(version=ver, executable_path=display or argv[0], supports_outputjson=_supports_outputjson(ver))
@@ -203,93 +249,434 @@ def get_pyright_version() -> VersionInfo:
         return VersionInfo(version="", executable_path=display or (argv[0] if argv else ""), supports_outputjson=False)
 
 
-def _iter_included_paths(root: Path, include: Optional[List[str]], exclude: Optional[List[str]]) -> List[Path]:
+def get_pyright_version() -> VersionInfo:
+    """Probe `pyright --version` (cached per PATH/VIRTUAL_ENV; failures are not cached)."""
+    info = _probe_pyright_version(_env_cache_key())
+    if not info["version"]:
+        _probe_pyright_version.cache_clear()
+    return VersionInfo(**info)
+
+
+# Runs get_pyright_version() concurrently with the main pyright process
+_VERSION_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyright-version")
+
+
+def invalidate_cache() -> None:
+    """Forget the resolved pyright executable and version, e.g. after installing/upgrading pyright."""
+    _resolve_pyright_argv.cache_clear()
+    _probe_pyright_version.cache_clear()
+
+
+_GLOB_MAGIC = ("*", "?", "[")
+ExcludeCheck = Callable[[str, str], bool]
+# A glob path component: "**", a literal name, or a compiled single-component wildcard
+GlobPart = str | re.Pattern[str]
+
+
+def _scandir(path: str) -> List[os.DirEntry[str]]:
+    try:
+        # Materialize so the directory handle is closed before recursing
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+@dataclass
+class _GlobMatches:
+    """Files matched by include globs; `linked` ones were reached through a symlink."""
+
+    files: set[str] = field(default_factory=set)
+    linked: set[str] = field(default_factory=set)
+
+    def add(self, path: str, via_link: bool) -> None:
+        (self.linked if via_link else self.files).add(path)
+
+
+def _walk_files(abs_dir: str, rel_dir: str, is_excluded: ExcludeCheck, out: _GlobMatches, via_link: bool) -> None:
+    """
+    Add every file below abs_dir to out. Excluded entries are skipped before they are
+    stat'ed or descended into; symlinked directories are not followed (as Path.rglob).
+    """
+    stack = [(abs_dir, rel_dir)]
+    while stack:
+        cur_abs, cur_rel = stack.pop()
+        for entry in _scandir(cur_abs):
+            rel = cur_rel + entry.name
+            if is_excluded(rel, entry.name):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, rel + "/"))
+            elif entry.is_file():
+                out.add(entry.path, via_link or entry.is_symlink())
+
+
+def _expand_include(
+    abs_dir: str,
+    rel_dir: str,
+    parts: List[GlobPart],
+    is_excluded: ExcludeCheck,
+    out: _GlobMatches,
+    via_link: bool = False,
+) -> None:
+    """
+    Match the remaining glob components `parts` below abs_dir with Path.glob semantics
+    ('**' spans directories, other wildcards match one component). Wildcard components
+    arrive precompiled (see _split_glob). Matched files are added to out; matched
+    directories contribute every file below them.
+
+    Paths are built by string joins under the already-resolved root, so they are
+    canonical unless via_link is set (a component on the way was a symlink or "..").
+    """
+    if not parts:
+        if os.path.isdir(abs_dir):
+            _walk_files(abs_dir, rel_dir + "/" if rel_dir else "", is_excluded, out, via_link)
+        elif os.path.isfile(abs_dir):
+            out.add(abs_dir, via_link)
+        return
+    part, rest = parts[0], parts[1:]
+    if part == "**":
+        if not rest:
+            _walk_files(abs_dir, rel_dir, is_excluded, out, via_link)
+            return
+        # Zero directories deep here, then one more level per non-excluded subdirectory
+        _expand_include(abs_dir, rel_dir, rest, is_excluded, out, via_link)
+        for entry in _scandir(abs_dir):
+            rel = rel_dir + entry.name
+            if entry.is_dir(follow_symlinks=False) and not is_excluded(rel, entry.name):
+                _expand_include(entry.path, rel + "/", parts, is_excluded, out, via_link)
+        return
+    if isinstance(part, re.Pattern):
+        for entry in _scandir(abs_dir):
+            if not part.match(entry.name):
+                continue
+            rel = rel_dir + entry.name
+            if is_excluded(rel, entry.name) or (rest and not entry.is_dir()):
+                continue
+            link = via_link or entry.is_symlink()
+            _expand_include(entry.path, rel + "/" if rest else rel, rest, is_excluded, out, link)
+        return
+    rel = rel_dir + part
+    if not is_excluded(rel, part):
+        child = os.path.join(abs_dir, part)
+        # ".." is resolved afterwards like a symlink, so each file has one spelling
+        link = via_link or part == ".." or os.path.islink(child)
+        _expand_include(child, rel + "/" if rest else rel, rest, is_excluded, out, link)
+
+
+def _split_glob(pat: str) -> List[GlobPart]:
+    parts: List[GlobPart] = []
+    for part in pat.replace(os.sep, "/").split("/"):
+        if not part or part == ".":
+            continue
+        if part == "**" and parts and parts[-1] == "**":
+            # "**/**" matches what "**" does; expanding both is combinatorial
+            continue
+        if part != "**" and any(c in part for c in _GLOB_MAGIC):
+            parts.append(_compile_globs([part]))
+        else:
+            parts.append(part)
+    return parts
+
+
+def _compile_globs(patterns: Iterable[str]) -> re.Pattern[str]:
+    """Compile fnmatch-style globs into one alternation; use .match() like fnmatch does."""
+    # fnmatch case-folds on platforms whose paths are case-insensitive (normcase)
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile("|".join(f"(?:{translate(p)})" for p in patterns), flags)
+
+
+def _make_exclude_check(exclude: Optional[List[str]]) -> ExcludeCheck:
+    """
+    Build a predicate over (posix path relative to the glob root, basename).
+
+    A path is excluded when a pattern matches either form. A directory is also pruned
+    when a pattern ending in '*' matches its relative path plus '/', because such a
+    pattern then matches everything below it.
+    """
+    if not exclude:
+        return lambda rel, name: False
+    match_any = _compile_globs(exclude).match
+    prefix_pats = [ex for ex in exclude if ex.endswith("*")]
+    match_prefix = _compile_globs(prefix_pats).match if prefix_pats else None
+
+    def is_excluded(rel: str, name: str) -> bool:
+        if match_any(rel) or match_any(name):
+            return True
+        return match_prefix is not None and match_prefix(rel + "/") is not None
+
+    return is_excluded
+
+
+def _iter_included_paths(
+    root: str | Path, include: Optional[List[str]], exclude: Optional[List[str]]
+) -> List[str]:
     """
     Expand include globs relative to root, filter exclude globs.
     If include is None, return [root].
+
+    Returns sorted, de-duplicated absolute paths. The tree is walked with os.scandir;
+    excluded directories are pruned rather than enumerated and filtered afterwards.
+    Only paths reached through a symlink are resolved.
     """
-    if include:
-        found: set[Path] = set()
-        for pat in include:
-            for p in root.glob(pat):
-                if p.is_file():
-                    found.add(p.resolve())
-                elif p.is_dir():
-                    for f in p.rglob("*"):
-                        if f.is_file():
-                            found.add(f.resolve())
-        paths = list(found)
-    else:
-        paths = [root.resolve()]
-
-    if exclude:
-        relroot = root.resolve()
-        filtered: List[Path] = []
-        for p in paths:
-            try:
-                rel = p.resolve().relative_to(relroot)
-                rel_posix = str(rel).replace("\\", "/")
-            except ValueError:
-                rel_posix = p.name
-            name = p.name
-            if any(fnmatch(rel_posix, ex) or fnmatch(name, ex) for ex in exclude):
-                continue
-            filtered.append(p)
-        return filtered
-    return paths
-
-
-def _normalize_diag(d: dict[str, Any]) -> DiagnosticOut:
-    file = str(d.get("file", ""))
-    sev_raw = d.get("severity", "information")
-    sev: Severity = sev_raw if sev_raw in ("information", "warning", "error") else "information"
-    rng = cast(dict[str, Any], d.get("range") or {})
-    start = cast(dict[str, Any], rng.get("start") or {})
-    end = cast(dict[str, Any], rng.get("end") or {})
-    norm: DiagnosticOut = {
-        "file": str(Path(file).resolve()),
-        "range": {
-            "start": {"line": int(start.get("line", 0)), "character": int(start.get("character", 0))},
-            "end": {"line": int(end.get("line", 0)), "character": int(end.get("character", 0))},
+    is_excluded = _make_exclude_check(exclude)
+    root_abs = os.path.realpath(root)
+    if not include:
+        return [] if is_excluded(".", os.path.basename(root_abs)) else [root_abs]
+
+    found = _GlobMatches()
+    for pat in include:
+        _expand_include(root_abs, "", _split_glob(pat), is_excluded, found)
+
+    paths = found.files
+    root_prefix = os.path.join(root_abs, "")
+    for f in found.linked:
+        real = os.path.realpath(f)
+        # Excludes also apply to where the link points
+        name = os.path.basename(real)
+        rel = real[len(root_prefix):].replace(os.sep, "/") if real.startswith(root_prefix) else name
+        if not is_excluded(rel, name):
+            paths.add(real)
+    return sorted(paths)
+
+
+def _resolve_target(target: str) -> Tuple[str, str]:
+    """
+    Return (resolved target, root that include globs are expanded under). For a file
+    target the root is the directory it was named in, not where a symlinked file points.
+    """
+    target_abs = os.path.realpath(target)
+    if os.path.isdir(target_abs):
+        return target_abs, target_abs
+    return target_abs, os.path.realpath(os.path.dirname(target) or ".")
+
+
+def _select_paths(target_abs: str, target_root: str, params: PyrightCheckParams) -> List[str]:
+    if params.include:
+        return _iter_included_paths(target_root, params.include, params.exclude)
+    return [target_abs]
+
+
+def _shard_paths(paths: List[str], workers: int) -> List[List[str]]:
+    """
+    Round-robin partition paths into at most `workers` shards.
+    Returns a single shard when there are too few paths for parallelism to pay off.
+    """
+    n = min(workers, len(paths) // _MIN_PATHS_PER_SHARD)
+    if len(paths) < _MIN_SHARD_PATHS or n <= 1:
+        return [paths]
+    return [paths[i::n] for i in range(n)]
+
+
+def _merge_reports(reports: List[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Combine Pyright JSON reports from parallel shards into one report.
+    Counters are summed; timeInSec is the slowest shard (shards run concurrently).
+    """
+    diags: List[Any] = []
+    files = errors = warnings = infos = 0
+    time_sec = 0.0
+    for rep in reports:
+        diags.extend(rep.get("generalDiagnostics", []) or [])
+        summ = cast(dict[str, Any], rep.get("summary", {}) or {})
+        files += int(summ.get("filesAnalyzed", 0))
+        errors += int(summ.get("errorCount", 0))
+        warnings += int(summ.get("warningCount", 0))
+        infos += int(summ.get("informationCount", 0))
+        time_sec = max(time_sec, float(summ.get("timeInSec", 0.0)))
+    return {
+        "version": reports[0].get("version") if reports else None,
+        "generalDiagnostics": diags,
+        "summary": {
+            "filesAnalyzed": files,
+            "errorCount": errors,
+            "warningCount": warnings,
+            "informationCount": infos,
+            "timeInSec": time_sec,
         },
+    }
+
+
+def _run_pyright(cmd: List[str], cwd: str, timeout_sec: int) -> subprocess.CompletedProcess[bytes]:
+    """
+    Run pyright and capture its raw stdout/stderr bytes (the JSON report is parsed
+    without a separate UTF-8 decode pass).
+
+    On Linux the exit is awaited through a pidfd selected alongside the output pipes, so
+    a finished check is noticed at once instead of via Popen.wait()'s sleep/poll loop.
+    Raises subprocess.TimeoutExpired, after killing pyright, once timeout_sec elapses.
+    """
+    # Our fds are non-inheritable (PEP 446), so skipping the close_fds sweep is safe
+    with subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=False) as proc:
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except (AttributeError, OSError):
+            # Not Linux, or a kernel older than 5.3
+            try:
+                stdout, stderr = proc.communicate(timeout=timeout_sec)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                raise
+            return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+        try:
+            stdout, stderr = _communicate_pidfd(proc, pidfd, timeout_sec)
+        finally:
+            os.close(pidfd)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+# Pipe read size; large reports arrive in a few dozen reads instead of thousands.
+_READ_CHUNK = 1 << 16
+
+
+def _communicate_pidfd(proc: subprocess.Popen[bytes], pidfd: int, timeout_sec: int) -> Tuple[bytes, bytes]:
+    # Drain both pipes (a full pipe would block pyright) until EOF and process exit.
+    assert proc.stdout is not None and proc.stderr is not None
+    out_fd, err_fd = proc.stdout.fileno(), proc.stderr.fileno()
+    bufs: Dict[int, bytearray] = {out_fd: bytearray(), err_fd: bytearray()}
+    deadline = time.monotonic() + timeout_sec
+    with selectors.DefaultSelector() as sel:
+        for fd in (out_fd, err_fd, pidfd):
+            sel.register(fd, selectors.EVENT_READ)
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                proc.kill()
+                raise subprocess.TimeoutExpired(proc.args, timeout_sec, bytes(bufs[out_fd]), bytes(bufs[err_fd]))
+            for key, _ in sel.select(remaining):
+                if key.fd == pidfd:
+                    sel.unregister(pidfd)
+                    continue
+                data = os.read(key.fd, _READ_CHUNK)
+                if data:
+                    bufs[key.fd] += data
+                else:
+                    sel.unregister(key.fd)
+    proc.wait()  # Already exited: reaps without polling
+    return bytes(bufs[out_fd]), bytes(bufs[err_fd])
+
+
+@functools.lru_cache(maxsize=8192)
+def _cached_resolve(s: str) -> str:
+    # Diagnostics repeat the same handful of files; resolve each path once per check.
+    return str(Path(s).resolve())
+
+
+_VALID_SEV: frozenset[str] = frozenset(SEVERITY_LEVEL)
+
+
+def _lenient_range(rng_val: Any) -> Range:
+    # Slow path for malformed ranges: default missing parts to 0 and coerce to int.
+    rng = cast(dict[str, Any], rng_val if isinstance(rng_val, dict) else {})
+    start = cast(dict[str, Any], rng.get("start") if isinstance(rng.get("start"), dict) else {})
+    end = cast(dict[str, Any], rng.get("end") if isinstance(rng.get("end"), dict) else {})
+    return {
+        "start": {"line": int(start.get("line", 0)), "character": int(start.get("character", 0))},
+        "end": {"line": int(end.get("line", 0)), "character": int(end.get("character", 0))},
+    }
+
+
+# Diagnostics are ordered by (file, start line, start character)
+DiagSortKey = Tuple[str, int, int]
+_by_sort_key = operator.itemgetter(0)
+
+
+def _normalize_diag(
+    d: dict[str, Any],
+    _sev_map: Dict[Severity, int] = SEVERITY_LEVEL,
+    _valid_sev: frozenset[str] = _VALID_SEV,
+    _resolve: Callable[[str], str] = _cached_resolve,
+) -> Tuple[DiagSortKey, DiagnosticOut]:
+    """Normalize one raw Pyright diagnostic; returns it with its sort key, built from the same lookups."""
+    # Runs once per diagnostic: helpers are bound as defaults so lookups are local.
+    sev_raw = d.get("severity")
+    sev = cast(Severity, sev_raw) if sev_raw in _valid_sev else "information"
+    try:
+        rng = d["range"]
+        start = rng["start"]
+        end = rng["end"]
+        rng_out: Range = {
+            "start": {"line": start["line"], "character": start["character"]},
+            "end": {"line": end["line"], "character": end["character"]},
+        }
+    except (KeyError, TypeError):
+        rng_out = _lenient_range(d.get("range"))
+    rule = d.get("rule")
+    if not isinstance(rule, str):
+        rule = None
+    file = _resolve(str(d.get("file", "")))
+    start_out = rng_out["start"]
+    return (file, start_out["line"], start_out["character"]), {
+        "file": file,
+        "range": rng_out,
         "severity": sev,
-        "severity_level": SEVERITY_LEVEL[sev],
+        "severity_level": _sev_map[sev],
         "message": str(d.get("message", "")),
+        "rule": rule,
+        "code": rule,
     }
-    rule_val = d.get("rule")
-    norm["rule"] = str(rule_val) if isinstance(rule_val, str) else None
-    norm["code"] = norm["rule"]
-    return norm
+
+
+_get_severity_level = operator.itemgetter("severity_level")
 
 
 def _compute_threshold_ok(diags: Iterable[DiagnosticOut], threshold: FailOn) -> Tuple[bool, Optional[str]]:
     if threshold == "none":
         return True, None
-    th_val = {"information": 1, "warning": 2, "error": 3}[threshold]
-    max_sev = 0
-    for d in diags:
-        max_sev = max(max_sev, d["severity_level"])
-        if max_sev >= th_val:
-            break
-    if max_sev >= th_val and max_sev > 0:
-        msg = f"fail_on_severity '{threshold}' breached (max_severity_level={max_sev})."
-        return False, msg
+    th_val = SEVERITY_LEVEL[threshold]
+    # The first breaching diagnostic decides; no running maximum is needed
+    for level in map(_get_severity_level, diags):
+        if level >= th_val:
+            return False, f"fail_on_severity '{threshold}' breached (max_severity_level={level})."
     return True, None
 
 
 class PyrightRunner:
     """
     Execute Pyright with JSON output and normalize results for automated tooling.
+
+    With use_daemon=True (or PYRIGHT_MCP_DAEMON=1 when use_daemon is None), checks are
+    forwarded to a long-lived pyright-mcp daemon over a Unix socket, falling back to
+    running in-process if the daemon cannot be reached. This pays off for short-lived
+    callers such as the CLI; the MCP server always runs checks in-process.
+
+    With use_watch=True (or PYRIGHT_MCP_WATCH=1 when use_watch is None), unsharded checks
+    are answered by a persistent `pyright --watch` process per command (see
+    pyright_mcp.watch), falling back to a one-shot run when its report is not current.
     """
 
+    def __init__(self, use_daemon: Optional[bool] = None, use_watch: Optional[bool] = None) -> None:
+        if use_daemon is None:
+            use_daemon = _env_flag("PYRIGHT_MCP_DAEMON") and hasattr(socket, "AF_UNIX")
+        if use_watch is None:
+            use_watch = _env_flag("PYRIGHT_MCP_WATCH")
+        self.use_daemon = use_daemon
+        self.use_watch = use_watch
+
     def run_check(self, params: PyrightCheckParams) -> CheckResult:
+        if self.use_daemon:
+            from .daemon import run_check_via_daemon
+
+            result = run_check_via_daemon(params)
+            if result is not None:
+                return result
+        return self._run_check_local(params)
+
+    def _select_files(self, params: PyrightCheckParams) -> List[str]:
+        """Return the paths a check of params passes to Pyright, after include/exclude filtering."""
+        return _select_paths(*_resolve_target(os.fspath(params.target)), params)
+
+    def _run_check_local(self, params: PyrightCheckParams) -> CheckResult:
+        # Paths may have changed (or belong to another workspace) since the last check
+        _cached_resolve.cache_clear()
         venv_path = _detect_venv_path()
-        target_path = Path(params.target)
-        if not target_path.exists():
-            analyzed_root = (Path(params.cwd) if params.cwd else target_path.parent).resolve()
+        # Canonicalize target and roots once, as strings
+        target = os.fspath(params.target)
+        if not os.path.exists(target):
+            analyzed_root = os.path.realpath(params.cwd or os.path.dirname(target) or ".")
             return CheckResult(
                 ok=False,
-                fail_reason=f"Target path not found: {target_path}",
+                fail_reason=f"Target path not found: {Path(target)}",
                 command=[],
                 exit_code=4,
                 summary=SummaryOut(
@@ -301,29 +688,18 @@ class PyrightRunner:
                 ),
                 diagnostics=[],
                 pyright_version=get_pyright_version().get("version", ""),
-                analyzed_root=str(analyzed_root),
+                analyzed_root=analyzed_root,
                 checked_paths=[],
                 venv_path=venv_path,
             )
+        target_abs, target_root = _resolve_target(target)
 
         # Determine analysis root
-        if params.cwd:
-            analyzed_root = Path(params.cwd).resolve()
-        else:
-            analyzed_root = target_path.resolve() if target_path.is_dir() else target_path.parent.resolve()
+        analyzed_root = os.path.realpath(params.cwd) if params.cwd else target_root
 
         # Prepare list of paths we will check (what we pass to Pyright)
-        if target_path.is_dir():
-            root_for_globs_checked = target_path.resolve()
-        else:
-            root_for_globs_checked = target_path.parent.resolve()
-        paths_for_checked = _iter_included_paths(root_for_globs_checked, params.include, params.exclude)
-        if params.include:
-            checked_paths = [str(p) for p in sorted(set(paths_for_checked))]
-        else:
-            checked_paths = [str(target_path.resolve())]
+        checked_paths = _select_paths(target_abs, target_root, params)
 
-        version_info = get_pyright_version()
         argv_prefix, display_exe = _build_pyright_argv()
         if not argv_prefix:
             return CheckResult(
@@ -344,44 +720,45 @@ class PyrightRunner:
                 ),
                 diagnostics=[],
                 pyright_version="",
-                analyzed_root=str(analyzed_root),
+                analyzed_root=analyzed_root,
                 checked_paths=checked_paths,
                 venv_path=venv_path,
             )
 
+        # The `pyright --version` probe (a Node start-up when not cached) overlaps the
+        # analysis; it is only waited for when the JSON report carries no version.
+        version_future = _VERSION_POOL.submit(get_pyright_version)
+
         # Build invocation
         argv: List[str] = [*argv_prefix, "--outputjson"]
         if params.extra_args:
             argv.extend(params.extra_args)
 
-        # Expand include/exclude if provided
-        if target_path.is_dir():
-            root_for_globs = target_path.resolve()
-        else:
-            root_for_globs = target_path.parent.resolve()
+        # If include specified, pass explicit files; else pass target directly
+        path_args = checked_paths
 
-        paths: List[Path] = _iter_included_paths(root_for_globs, params.include, params.exclude)
+        # Reported as `command`; a sharded run executes it split by path
+        cmd = argv + path_args
 
-        # If include specified, pass explicit files; else pass target directly
+        # Large explicit include sets are split across parallel pyright processes
         if params.include:
-            path_args = [str(p) for p in sorted(set(paths))]
+            shards = _shard_paths(path_args, params.workers or os.cpu_count() or 1)
         else:
-            path_args = [str(target_path.resolve())]
-
-        cmd = argv + path_args
+            shards = [path_args]
 
         try:
-            cp = subprocess.run(
-                cmd,
-                cwd=str(analyzed_root),
-                check=False,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                timeout=params.timeout_sec,
-            )
+            if len(shards) == 1:
+                watched = None
+                if self.use_watch:
+                    from .watch import run_watched
+
+                    watched = run_watched(argv, path_args, analyzed_root, params.timeout_sec)
+                cps = [watched if watched is not None else _run_pyright(cmd, analyzed_root, params.timeout_sec)]
+            else:
+                with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+                    cps = list(
+                        pool.map(lambda shard: _run_pyright(argv + shard, analyzed_root, params.timeout_sec), shards)
+                    )
         except subprocess.TimeoutExpired:
             return CheckResult(
                 ok=False,
@@ -399,8 +776,8 @@ class PyrightRunner:
                     time_sec=0.0,
                 ),
                 diagnostics=[],
-                pyright_version=version_info["version"],
-                analyzed_root=str(analyzed_root),
+                pyright_version=version_future.result()["version"],
+                analyzed_root=analyzed_root,
                 checked_paths=checked_paths,
                 venv_path=venv_path,
             )
@@ -419,17 +796,21 @@ class PyrightRunner:
                     time_sec=0.0,
                 ),
                 diagnostics=[],
-                pyright_version=version_info["version"],
-                analyzed_root=str(analyzed_root),
+                pyright_version=version_future.result()["version"],
+                analyzed_root=analyzed_root,
                 checked_paths=checked_paths,
                 venv_path=venv_path,
             )
 
-        raw_output = cp.stdout or ""
-        parsed = parse_pyright_json(raw_output)
-        if parsed is None:
+        reports: List[dict[str, Any]] = []
+        for cp in cps:
+            raw_output = cp.stdout or b""
+            parsed = parse_pyright_json(raw_output)
+            if parsed is not None:
+                reports.append(parsed)
+                continue
             # Include tail of stdout/stderr for debugging
-            tail = (raw_output + "\n" + (cp.stderr or "")).strip()
+            tail = (raw_output + b"\n" + (cp.stderr or b"")).decode("utf-8", errors="replace").strip()
             tail_excerpt = tail[-1000:] if len(tail) > 1000 else tail
             return CheckResult(
                 ok=False,
@@ -447,16 +828,20 @@ class PyrightRunner:
                     time_sec=0.0,
                 ),
                 diagnostics=[],
-                pyright_version=version_info["version"],
-                analyzed_root=str(analyzed_root),
+                pyright_version=version_future.result()["version"],
+                analyzed_root=analyzed_root,
                 checked_paths=checked_paths,
                 venv_path=venv_path,
             )
 
+        parsed = reports[0] if len(reports) == 1 else _merge_reports(reports)
+        exit_code = max(cp.returncode for cp in cps)
+
         # Normalize diagnostics
         diags_raw = cast(list[dict[str, Any]], parsed.get("generalDiagnostics", []) or [])
-        diags: List[DiagnosticOut] = [_normalize_diag(d) for d in diags_raw]
-        diags.sort(key=lambda d: (d["file"], d["range"]["start"]["line"], d["range"]["start"]["character"]))
+        keyed = [_normalize_diag(d) for d in diags_raw]
+        keyed.sort(key=_by_sort_key)
+        diags: List[DiagnosticOut] = [d for _, d in keyed]
 
         # Normalize summary
         summary_raw = cast(dict[str, Any], parsed.get("summary", {}) or {})
@@ -474,11 +859,11 @@ class PyrightRunner:
             ok=ok,
             fail_reason=reason,
             command=cmd,
-            exit_code=cp.returncode,
+            exit_code=exit_code,
             summary=summary,
             diagnostics=diags,
-            pyright_version=str(parsed.get("version") or version_info["version"]),
-            analyzed_root=str(analyzed_root),
+            pyright_version=str(parsed.get("version") or version_future.result()["version"]),
+            analyzed_root=analyzed_root,
             checked_paths=checked_paths,
             venv_path=venv_path,
         )
@@ -1,22 +1,24 @@
 from __future__ import annotations
 
-from typing import Optional
+import os
+import signal
+import sys
+from typing import TYPE_CHECKING, Any, Optional
 
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field
 
-from .config import find_pyright_config as do_find_config
+# Tool signatures are introspected at registration, so the models are imported eagerly;
+# the runner and config modules are only loaded when a tool is first called.
 from .models import (
     FailOn,
     FindConfigResultModel,
     PyrightCheckResultModel,
     PyrightVersionResultModel,
-    DiagnosticModel,
-    SummaryModel,
-    RangeModel,
-    RangePosModel,
 )
-from .runner import CheckResult, PyrightCheckParams, PyrightRunner, get_pyright_version
+
+if TYPE_CHECKING:
+    from .runner import CheckResult
 
 
 mcp = FastMCP("Pyright MCP Server")
@@ -33,6 +35,9 @@ class PyrightCheckInput(BaseModel):
         default=None, description="Additional Pyright CLI args, e.g. ['--pythonversion','3.12']"
     )
     timeout_sec: int = Field(default=60, ge=1, description="Timeout in seconds")
+    workers: Optional[int] = Field(
+        default=None, ge=1, description="Parallel Pyright processes for large include sets (default: CPU count)"
+    )
     fail_on_severity: FailOn = Field(
         default="none",
         description="Threshold to mark ok=false when diagnostics at or above this severity are present",
@@ -44,6 +49,8 @@ def pyright_version() -> PyrightVersionResultModel:
     """
     Return pyright CLI version info and resolved executable path.
     """
+    from .runner import get_pyright_version
+
     info = get_pyright_version()
     return PyrightVersionResultModel(
         version=info["version"],
@@ -57,6 +64,8 @@ def find_pyright_config(start_dir: str | None = None) -> FindConfigResultModel:
     """
     Discover the configuration file used by Pyright starting from start_dir (or CWD if omitted).
     """
+    from .config import find_pyright_config as do_find_config
+
     return do_find_config(start_dir)
 
 
@@ -69,11 +78,16 @@ def pyright_check(
     extra_args: list[str] | None = None,
     timeout_sec: int = 60,
     fail_on_severity: FailOn = "none",
+    workers: int | None = None,
 ) -> PyrightCheckResultModel:
     """
     Run Pyright with JSON output and return normalized, structured diagnostics.
     """
-    runner = PyrightRunner()
+    from .runner import PyrightCheckParams, PyrightRunner
+
+    # The server is as long-lived as the daemon: forwarding to it would only add a hop, so
+    # PYRIGHT_MCP_DAEMON applies to short-lived callers (CLI, client) only
+    runner = PyrightRunner(use_daemon=False)
     params = PyrightCheckParams(
         target=target,
         cwd=cwd,
@@ -82,48 +96,30 @@ def pyright_check(
         extra_args=extra_args,
         timeout_sec=timeout_sec,
         fail_on_severity=fail_on_severity,
+        workers=workers,
     )
     out: CheckResult = runner.run_check(params)
+    # One validation pass over the nested dict inside pydantic-core; building each
+    # Diagnostic/Range model from Python is several times slower on large reports.
+    return PyrightCheckResultModel.model_validate(out)
 
-    summary_model = SummaryModel(
-        files_analyzed=out["summary"]["files_analyzed"],
-        error_count=out["summary"]["error_count"],
-        warning_count=out["summary"]["warning_count"],
-        information_count=out["summary"]["information_count"],
-        time_sec=out["summary"]["time_sec"],
-    )
 
-    diagnostics_models = [
-        DiagnosticModel(
-            file=d["file"],
-            range=RangeModel(
-                start=RangePosModel(**d["range"]["start"]),
-                end=RangePosModel(**d["range"]["end"]),
-            ),
-            severity=d["severity"],
-            severity_level=d["severity_level"],
-            code=d.get("code"),
-            rule=d.get("rule"),
-            message=d["message"],
-        )
-        for d in out["diagnostics"]
-    ]
-
-    return PyrightCheckResultModel(
-        ok=out["ok"],
-        fail_reason=out["fail_reason"],
-        command=[str(x) for x in out["command"]],
-        exit_code=out["exit_code"],
-        summary=summary_model,
-        diagnostics=diagnostics_models,
-        pyright_version=out["pyright_version"],
-        analyzed_root=out["analyzed_root"],
-        checked_paths=[str(p) for p in out["checked_paths"]],
-        venv_path=out["venv_path"],
-    )
+def _close_watch_and_reraise(signum: int, frame: Any) -> None:
+    # Watch processes run in their own session, out of reach of signals sent to the
+    # server's process group, and the default action would skip atexit
+    watch = sys.modules.get(f"{__package__}.watch")
+    if watch is not None:
+        watch.close_all()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
 
 
 def main() -> None:
+    # MCP clients may stop the server with SIGTERM/SIGHUP: stop watch sessions first
+    for name in ("SIGTERM", "SIGHUP"):
+        sig = getattr(signal, name, None)
+        if sig is not None:
+            signal.signal(sig, _close_watch_and_reraise)
     # Run the FastMCP server over stdio (default transport for direct execution)
     mcp.run()
 
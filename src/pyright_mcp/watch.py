@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+# Long-lived `pyright --watch --outputjson` sessions. Pyright keeps its parsed modules and
+# type caches in memory and re-emits a full JSON report after every file change, so a
+# repeated check of an unchanged (or lightly edited) workspace is answered from the latest
+# report instead of a cold Node start and full analysis.
+import atexit
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .runner import parse_pyright_json
+
+# Idle sessions beyond this many (least recently used first) are shut down.
+_MAX_SESSIONS = 4
+
+# How long to wait for pyright to re-emit after a change to a watched file before
+# replacing the session (pyright debounces file events by about a second).
+_SETTLE_SEC = 2.0
+
+# Pyright's file watcher is only armed about a second after the first report; a change
+# made before that is never picked up, so the session is replaced right away.
+_WATCH_ARM_SEC = 1.5
+
+# Timestamps may round an edit made just after analysis started down to just before it;
+# treat anything this close to the start as not yet analyzed.
+_MTIME_SLACK_SEC = 0.05
+# Filesystems with whole-second timestamps (FAT has 2 s, HFS+ and some NFS mounts 1 s)
+# need a slack of their full granularity.
+_COARSE_MTIME_SLACK_SEC = 2.0
+
+_NS_PER_SEC = 1_000_000_000
+
+_POSIX = os.name == "posix"
+
+_SKIP_DIRS = frozenset({"node_modules", "__pycache__"})
+_CONFIG_FILES = ("pyrightconfig.json", "pyproject.toml")
+
+SessionKey = Tuple[str, Tuple[str, ...]]
+
+
+class _SourceScan(NamedTuple):
+    # Newest mtime among the checked paths and everything below checked directories
+    # (pyright's watcher reports changes to these)
+    watched: float
+    # Newest mtime among other sources under the analysis root and the config files
+    # (modules the checked files may import; pyright does not re-analyze on these)
+    other: float
+    # Python sources found
+    sources: int
+    # Some mtime was a whole second: the filesystem likely has coarse timestamps
+    coarse: bool
+
+
+def _mtime_ns(st: os.stat_result, newest: int, coarse: bool) -> Tuple[int, bool]:
+    ns = st.st_mtime_ns
+    return max(newest, ns), coarse or ns % _NS_PER_SEC == 0
+
+
+def _walk_sources(top: str, seen: Set[str]) -> Tuple[int, int, bool]:
+    """
+    Return (newest mtime in ns, source count, coarse) of the directories and Python
+    sources below top. Hidden directories, node_modules, __pycache__, virtual
+    environments and paths already in seen are skipped; walked directories are added to
+    seen.
+    """
+    newest = 0
+    count = 0
+    coarse = False
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        if any(entry.name == "pyvenv.cfg" for entry in entries):
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.startswith(".") or entry.name in _SKIP_DIRS:
+                        continue
+                    stack.append(entry.path)
+                elif entry.name.endswith((".py", ".pyi")) and entry.path not in seen:
+                    count += 1
+                else:
+                    continue
+                newest, coarse = _mtime_ns(entry.stat(follow_symlinks=False), newest, coarse)
+            except OSError:
+                continue
+    return newest, count, coarse
+
+
+def _scan_sources(cwd: str, paths: List[str]) -> _SourceScan:
+    """
+    Scan the checked paths, every Python source under cwd (the analysis root) and the
+    Pyright config files in cwd. Directory mtimes cover files being added, removed or
+    renamed. A missing checked path yields an infinitely new scan.
+    """
+    watched = 0
+    count = 0
+    coarse = False
+    seen: Set[str] = set()
+    for p in paths:
+        try:
+            watched, coarse = _mtime_ns(os.stat(p), watched, coarse)
+        except OSError:
+            return _SourceScan(float("inf"), float("inf"), 0, False)
+        if os.path.isdir(p):
+            newest, n, walk_coarse = _walk_sources(p, seen)
+            watched = max(watched, newest)
+            count += n
+            coarse = coarse or walk_coarse
+        elif p not in seen:
+            seen.add(p)
+            count += 1
+    other = 0
+    for name in _CONFIG_FILES:
+        try:
+            other, coarse = _mtime_ns(os.stat(os.path.join(cwd, name)), other, coarse)
+        except OSError:
+            pass
+    if not any(cwd == p or cwd.startswith(os.path.join(p, "")) for p in paths):
+        try:
+            other, coarse = _mtime_ns(os.stat(cwd), other, coarse)
+        except OSError:
+            pass
+        newest, n, walk_coarse = _walk_sources(cwd, seen)
+        other = max(other, newest)
+        count += n
+        coarse = coarse or walk_coarse
+    return _SourceScan(watched / _NS_PER_SEC, other / _NS_PER_SEC, count, coarse)
+
+
+class _WatchSession:
+    """One `pyright --watch --outputjson` process and the latest report it emitted."""
+
+    def __init__(self, argv: List[str], paths: List[str], cwd: str) -> None:
+        self.cmd = [*argv, *paths]
+        self.paths = paths
+        self.cwd = cwd
+        self.cond = threading.Condition()
+        self.raw: Optional[bytes] = None
+        self.returncode = 0
+        # Wall-clock time at which the analysis behind `raw` started
+        self.analysis_start = 0.0
+        self.analysis_sec = 0.0
+        # Wall-clock time from which pyright's file watcher reports changes
+        self.armed_at = float("inf")
+        # Source files on disk when the latest report arrived
+        self.source_count = 0
+        self.seq = 0
+        self.closed = False
+        self.proc = subprocess.Popen(
+            [*self.cmd, "--watch"],
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=False,
+            # The `pyright` entry point may be a wrapper around node: signal the whole group
+            start_new_session=_POSIX,
+        )
+        threading.Thread(target=self._read_reports, name="pyright-watch", daemon=True).start()
+
+    def _read_reports(self) -> None:
+        assert self.proc.stdout is not None
+        buf: List[bytes] = []
+        for line in self.proc.stdout:
+            buf.append(line)
+            # Reports are pretty-printed: only the closing brace sits in column 0
+            if line.rstrip() != b"}":
+                continue
+            raw = b"".join(buf)
+            buf.clear()
+            report = parse_pyright_json(raw)
+            if report is None:
+                continue
+            summary: Dict[str, Any] = report.get("summary") or {}
+            try:
+                took = float(summary.get("timeInSec", 0.0))
+                emitted = int(report.get("time") or 0) / 1000.0 or time.time()
+            except (TypeError, ValueError):
+                took, emitted = 0.0, time.time()
+            count = _scan_sources(self.cwd, self.paths).sources
+            with self.cond:
+                if self.seq == 0:
+                    self.armed_at = emitted + _WATCH_ARM_SEC
+                self.raw = raw
+                self.returncode = 1 if summary.get("errorCount") else 0
+                self.analysis_start = emitted - took
+                self.analysis_sec = took
+                self.source_count = count
+                self.seq += 1
+                self.cond.notify_all()
+        self.proc.stdout.close()
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def latest(self, timeout_sec: float) -> Optional[subprocess.CompletedProcess[bytes]]:
+        """
+        Wait for a report that reflects the files on disk.
+
+        Returns None if the session ended or pyright will not re-analyze on its own: files
+        were deleted, a file outside the checked paths changed (e.g. an imported module), a
+        checked file changed before the file watcher was armed, or no new report arrived
+        within the settle window. Raises subprocess.TimeoutExpired if the first report
+        does not arrive within timeout_sec.
+        """
+        deadline = time.monotonic() + timeout_sec
+        while True:
+            with self.cond:
+                raw, returncode, seq, closed = self.raw, self.returncode, self.seq, self.closed
+                analysis_start = self.analysis_start
+                source_count, armed_at = self.source_count, self.armed_at
+            if raw is not None:
+                scan = _scan_sources(self.cwd, self.paths)
+                slack = _COARSE_MTIME_SLACK_SEC if scan.coarse else _MTIME_SLACK_SEC
+                fresh_before = analysis_start - slack
+                if max(scan.watched, scan.other) < fresh_before:
+                    return subprocess.CompletedProcess(self.cmd, returncode, raw, b"")
+                if scan.sources < source_count or scan.other >= fresh_before or scan.watched < armed_at:
+                    return None
+            if closed:
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.cmd, timeout_sec)
+            with self.cond:
+                if raw is None:
+                    self.cond.wait_for(lambda: self.seq != seq or self.closed, remaining)
+                    continue
+                # A watched file changed: pyright re-analyzes after its file-watch debounce
+                settle = min(remaining, _SETTLE_SEC + 2 * self.analysis_sec)
+                if self.cond.wait_for(lambda: self.seq != seq or self.closed, settle):
+                    continue
+            return None
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self._signal(signal.SIGTERM)
+            try:
+                self.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._signal(signal.SIGKILL if _POSIX else signal.SIGTERM)
+                self.proc.wait()
+        elif _POSIX:
+            # The wrapper may have exited while node lives on
+            self._signal(signal.SIGTERM)
+
+    def _signal(self, sig: int) -> None:
+        try:
+            if _POSIX:
+                os.killpg(self.proc.pid, sig)
+            else:
+                self.proc.send_signal(sig)
+        except OSError:
+            pass
+
+
+_SESSIONS: "OrderedDict[SessionKey, _WatchSession]" = OrderedDict()
+# Commands whose watch process ended before producing a report (e.g. an unsupported flag)
+_UNSUPPORTED: set[SessionKey] = set()
+_LOCK = threading.Lock()
+
+
+def _session_for(key: SessionKey, argv: List[str], paths: List[str], cwd: str) -> Optional[_WatchSession]:
+    evicted: List[_WatchSession] = []
+    with _LOCK:
+        if key in _UNSUPPORTED:
+            return None
+        session = _SESSIONS.get(key)
+        if session is None or session.proc.poll() is not None:
+            try:
+                session = _SESSIONS[key] = _WatchSession(argv, paths, cwd)
+            except OSError:
+                return None
+        _SESSIONS.move_to_end(key)
+        while len(_SESSIONS) > _MAX_SESSIONS:
+            evicted.append(_SESSIONS.popitem(last=False)[1])
+    for old in evicted:
+        old.close()
+    return session
+
+
+def _drop(key: SessionKey, session: _WatchSession) -> None:
+    with _LOCK:
+        if session.seq == 0 and session.proc.poll() is not None:
+            _UNSUPPORTED.add(key)
+        if _SESSIONS.get(key) is session:
+            del _SESSIONS[key]
+    session.close()
+
+
+def run_watched(argv: List[str], paths: List[str], cwd: str, timeout_sec: float) -> Optional[subprocess.CompletedProcess[bytes]]:
+    """
+    Answer `argv + paths` (run in cwd) from a watch session, starting one if needed.
+
+    A session that misses a change (pyright does not re-analyze deleted files) is
+    replaced by a fresh one, whose first report reflects the files on disk. Returns a
+    CompletedProcess carrying the raw JSON report, or None when the caller should run
+    pyright one-shot instead. Raises subprocess.TimeoutExpired like a one-shot run.
+    """
+    key: SessionKey = (cwd, (*argv, *paths))
+    deadline = time.monotonic() + timeout_sec
+    for _ in range(2):
+        session = _session_for(key, argv, paths, cwd)
+        if session is None:
+            return None
+        result = session.latest(deadline - time.monotonic())
+        if result is not None:
+            return result
+        _drop(key, session)
+    return None
+
+
+def close_all() -> None:
+    """Stop every watch session."""
+    with _LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_all)
@@ -4,7 +4,48 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 SRC_PATH = PROJECT_ROOT / "src"
+FIXTURES = PROJECT_ROOT / "tests" / "fixtures"
 if str(SRC_PATH) not in sys.path:
-    sys.path.insert(0, str(SRC_PATH))
\ No newline at end of file
+    sys.path.insert(0, str(SRC_PATH))
+
+
+@pytest.fixture(scope="session")
+def pyright_output_bytes() -> bytes:
+    """A recorded `pyright --outputjson` report with error, warning and information diagnostics."""
+    return (FIXTURES / "pyright_output.json").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def pyright_runner():
+    """
+    One PyrightRunner for the whole session; the pyright executable and version are
+    resolved (and cached) once up front instead of on the first check of every test.
+    """
+    from pyright_mcp.runner import PyrightRunner, get_pyright_version
+
+    get_pyright_version()
+    return PyrightRunner()
+
+
+@pytest.fixture(scope="session")
+def clean_project_result(tmp_path_factory: pytest.TempPathFactory, pyright_runner):
+    """
+    Result of checking a tiny type-clean project, computed once and shared by tests that
+    only assert on result shape or post-processing. Do not mutate it.
+    """
+    from pyright_mcp.runner import PyrightCheckParams
+
+    root = tmp_path_factory.mktemp("clean")
+    (root / "a.py").write_text(
+        "from __future__ import annotations\n\n"
+        "def add(a: int, b: int) -> int:\n    return a + b\n\n"
+        "x = add(1, 2)\n",
+        encoding="utf-8",
+    )
+    # Shape-only checks: skip analysis of unannotated function bodies
+    params = PyrightCheckParams(target=str(root), extra_args=["--skipunannotated"], fail_on_severity="none")
+    return pyright_runner.run_check(params)
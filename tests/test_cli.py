@@ -4,10 +4,13 @@ import json
 from pathlib import Path
 from typing import Any
 
+import pytest
 from click.testing import CliRunner
 
 from pyright_mcp.cli import main as cli_main
 
+pytestmark = pytest.mark.slow
+
 
 def test_cli_runs_and_outputs_json(tmp_path: Path) -> None:
     proj = tmp_path / "p1"
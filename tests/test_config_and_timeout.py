@@ -1,15 +1,28 @@
 from __future__ import annotations
 
 import subprocess
+import sys
+import time
 from pathlib import Path
 
+import pytest
+
+from pyright_mcp import runner as runner_mod
 from pyright_mcp.config import find_pyright_config
-from pyright_mcp.runner import PyrightRunner, PyrightCheckParams
+from pyright_mcp.runner import PyrightRunner, PyrightCheckParams, VersionInfo
 
+# Raised by the patched pyright invocation in the timeout test; the runner only
+# inspects the exception type, so one prebuilt instance serves every call.
+_TIMEOUT_EXC = subprocess.TimeoutExpired(cmd=["pyright"], timeout=0.001)
+_VERSION_INFO = VersionInfo(version="1.1.414", executable_path="pyright", supports_outputjson=True)
 
-def test_find_config_prefers_pyrightconfig_json(tmp_path: Path) -> None:
-    root = tmp_path / "proj"
-    root.mkdir()
+
+# Read-only sample projects, built once per session
+
+
+@pytest.fixture(scope="session")
+def proj_with_pyrightconfig(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    root = tmp_path_factory.mktemp("proj")
     # Both files exist, pyrightconfig.json should win
     (root / "pyrightconfig.json").write_text("{}", encoding="utf-8")
     (root / "pyproject.toml").write_text(
@@ -19,17 +32,12 @@ include = ["src"]
         """.strip(),
         encoding="utf-8",
     )
-
-    res = find_pyright_config(str(root))
-    assert res.found is True
-    assert res.kind == "pyrightconfig.json"
-    assert res.config_path and res.config_path.endswith("pyrightconfig.json")
-    assert res.resolve_dir == str(root.resolve())
+    return root
 
 
-def test_find_config_pyproject_when_section_present(tmp_path: Path) -> None:
-    root = tmp_path / "proj2"
-    root.mkdir()
+@pytest.fixture(scope="session")
+def proj_with_pyproject_section(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    root = tmp_path_factory.mktemp("proj2")
     (root / "pyproject.toml").write_text(
         """
 [project]
@@ -40,21 +48,59 @@ typeCheckingMode = "standard"
         """.strip(),
         encoding="utf-8",
     )
-    res = find_pyright_config(str(root))
+    return root
+
+
+@pytest.fixture(scope="session")
+def proj_without_config(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("no-config")
+
+
+def test_find_config_prefers_pyrightconfig_json(proj_with_pyrightconfig: Path) -> None:
+    resolved = str(proj_with_pyrightconfig.resolve())
+    res = find_pyright_config(resolved)
+    assert res.found is True
+    assert res.kind == "pyrightconfig.json"
+    assert res.config_path and res.config_path.endswith("pyrightconfig.json")
+    assert res.resolve_dir == resolved
+
+
+def test_find_config_pyproject_when_section_present(proj_with_pyproject_section: Path) -> None:
+    resolved = str(proj_with_pyproject_section.resolve())
+    res = find_pyright_config(resolved)
     assert res.found is True
     assert res.kind == "pyproject.toml"
     assert res.config_path and res.config_path.endswith("pyproject.toml")
-    assert res.resolve_dir == str(root.resolve())
+    assert res.resolve_dir == resolved
 
 
-def test_find_config_not_found(tmp_path: Path) -> None:
-    root = tmp_path / "no-config"
+def test_find_config_ignores_commented_or_nested_header(tmp_path: Path) -> None:
+    root = tmp_path / "proj3"
     root.mkdir()
+    (root / "pyproject.toml").write_text(
+        """
+# [tool.pyright]
+name = "[tool.pyright]"
+[tool.pyright.extra]
+        """.strip(),
+        encoding="utf-8",
+    )
+    res = find_pyright_config(str(root))
+    assert res.found is False
+
+    (root / "pyproject.toml").write_text('[project]\nname = "x"\n\n  [tool.pyright]  # indented\n', encoding="utf-8")
     res = find_pyright_config(str(root))
+    assert res.found is True
+    assert res.kind == "pyproject.toml"
+
+
+def test_find_config_not_found(proj_without_config: Path) -> None:
+    resolved = str(proj_without_config.resolve())
+    res = find_pyright_config(resolved)
     assert res.found is False
     assert res.config_path is None
     assert res.kind is None
-    assert res.resolve_dir == str(root.resolve())
+    assert res.resolve_dir == resolved
 
 
 def test_runner_timeout_path(tmp_path: Path, monkeypatch) -> None:
@@ -62,15 +108,30 @@ def test_runner_timeout_path(tmp_path: Path, monkeypatch) -> None:
     target = tmp_path / "p"
     target.mkdir()
 
-    # Monkeypatch subprocess.run in our module to raise TimeoutExpired
-    def fake_run(*args, **kwargs):
-        raise subprocess.TimeoutExpired(cmd=kwargs.get("args") or args[0], timeout=0.001)
+    # Patch the pyright invocation seam on the module object to raise TimeoutExpired
+    def fake_run(cmd, cwd, timeout_sec):
+        raise _TIMEOUT_EXC
 
-    monkeypatch.setattr("pyright_mcp.runner.subprocess.run", fake_run)
+    monkeypatch.setattr(runner_mod, "_run_pyright", fake_run)
+    # Keep this test hermetic: no pyright lookup or `pyright --version` probe
+    monkeypatch.setattr(runner_mod, "_build_pyright_argv", lambda: (["pyright"], "pyright"))
+    monkeypatch.setattr(runner_mod, "get_pyright_version", lambda: _VERSION_INFO)
 
     runner = PyrightRunner()
     params = PyrightCheckParams(target=str(target), timeout_sec=1)
     out = runner.run_check(params)
     assert out["ok"] is False
     assert out["exit_code"] == -1
-    assert "timeout" in (out["fail_reason"] or "").lower()
\ No newline at end of file
+    assert "timeout" in (out["fail_reason"] or "").lower()
+
+
+@pytest.mark.slow
+def test_run_pyright_kills_process_on_timeout(tmp_path: Path) -> None:
+    from pyright_mcp.runner import _run_pyright
+
+    cmd = [sys.executable, "-c", "import sys, time; sys.stdout.write('x' * 200000); sys.stdout.flush(); time.sleep(30)"]
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired) as exc:
+        _run_pyright(cmd, str(tmp_path), timeout_sec=1)
+    assert time.monotonic() - start < 10
+    assert len(exc.value.output or b"") == 200000
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from pyright_mcp import daemon
+from pyright_mcp.runner import PyrightCheckParams, PyrightRunner
+
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
+
+
+@pytest.fixture
+def daemon_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # Isolate the socket/PID/log under tmp_path and make the spawned daemon import this tree
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [str(SRC_PATH), os.environ.get("PYTHONPATH")])))
+    yield tmp_path
+    daemon.stop_daemon()
+
+
+@pytest.mark.slow
+def test_daemon_roundtrip(daemon_env: Path) -> None:
+    proj = daemon_env / "proj"
+    proj.mkdir()
+    (proj / "bad.py").write_text("x: int = 'oops'\n", encoding="utf-8")
+
+    runner = PyrightRunner(use_daemon=True)
+    out = runner.run_check(PyrightCheckParams(target=str(proj)))
+    assert out["summary"]["error_count"] >= 1
+    assert os.path.exists(daemon.socket_path())
+    assert Path(daemon.pid_path()).read_text(encoding="utf-8").strip() != str(os.getpid())
+
+    # Second call reuses the running daemon
+    again = runner.run_check(PyrightCheckParams(target=str(proj)))
+    assert again["diagnostics"] == out["diagnostics"]
+
+    assert daemon.stop_daemon() is True
+    assert not os.path.exists(daemon.socket_path())
+
+
+@pytest.mark.slow
+def test_daemon_unavailable_falls_back_to_local(daemon_env: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(daemon, "ensure_daemon", lambda: False)
+    proj = daemon_env / "proj"
+    proj.mkdir()
+    (proj / "ok.py").write_text("x: int = 1\n", encoding="utf-8")
+
+    out = PyrightRunner(use_daemon=True).run_check(PyrightCheckParams(target=str(proj)))
+    assert out["ok"] is True
+    assert out["command"]
+
+
+@pytest.mark.slow
+def test_thin_client_forwards_argv(daemon_env: Path) -> None:
+    proj = daemon_env / "proj"
+    proj.mkdir()
+    (proj / "bad.py").write_text("x: int = 'oops'\n", encoding="utf-8")
+
+    # Relative target: resolved against the client's working directory, not the daemon's
+    cp = subprocess.run(
+        [sys.executable, "-m", "pyright_mcp.client", "proj", "--fail-on-severity", "error"],
+        cwd=str(daemon_env),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert cp.returncode == 1, cp.stderr
+    payload = json.loads(cp.stdout)
+    assert payload["ok"] is False
+    assert payload["checked_paths"] == [str(proj.resolve())]
+    assert os.path.exists(daemon.socket_path())
+
+
+def test_daemon_files_are_per_environment(daemon_env: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("VIRTUAL_ENV", str(daemon_env / "venv-a"))
+    paths_a = (daemon.socket_path(), daemon.pid_path())
+    assert paths_a == (daemon.socket_path(), daemon.pid_path())
+    monkeypatch.setenv("VIRTUAL_ENV", str(daemon_env / "venv-b"))
+    assert daemon.socket_path() not in paths_a
+    assert daemon.pid_path() not in paths_a
+
+
+@pytest.mark.slow
+def test_daemon_per_environment_venv_path(daemon_env: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    proj = daemon_env / "proj"
+    proj.mkdir()
+    (proj / "ok.py").write_text("x: int = 1\n", encoding="utf-8")
+    runner = PyrightRunner(use_daemon=True)
+
+    for name in ["venv-a", "venv-b"]:
+        venv = daemon_env / name
+        venv.mkdir()
+        monkeypatch.setenv("VIRTUAL_ENV", str(venv))
+        out = runner.run_check(PyrightCheckParams(target=str(proj)))
+        # Answered by a daemon started in this environment, not the previous one
+        assert out["venv_path"] == str(venv.resolve())
+
+    # Both daemons are running; stop venv-a's here and leave venv-b's to the fixture
+    monkeypatch.setenv("VIRTUAL_ENV", str(daemon_env / "venv-a"))
+    assert daemon.stop_daemon() is True
+    monkeypatch.setenv("VIRTUAL_ENV", str(daemon_env / "venv-b"))
+
+
+@pytest.mark.slow
+def test_daemon_sigterm_cleans_up(daemon_env: Path) -> None:
+    from pyright_mcp.client import ensure_daemon
+
+    assert ensure_daemon()
+    pid = int(Path(daemon.pid_path()).read_text(encoding="utf-8"))
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + 10
+    while os.path.exists(daemon.socket_path()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    # serve() unwound through its cleanup instead of dying with the socket in place
+    assert not os.path.exists(daemon.socket_path())
+    assert not os.path.exists(daemon.pid_path())
+
+
+@pytest.mark.slow
+def test_concurrent_spawns_leave_one_daemon(daemon_env: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from pyright_mcp import client
+
+    n = 6
+    # Every client finds no daemon before any of them spawns one
+    barrier = threading.Barrier(n, timeout=10)
+    real_spawn = client._spawn_daemon
+
+    def spawn_together() -> None:
+        barrier.wait()
+        real_spawn()
+
+    monkeypatch.setattr(client, "_spawn_daemon", spawn_together)
+    with ThreadPoolExecutor(n) as pool:
+        assert all(pool.map(lambda _: client.ensure_daemon(), range(n)))
+
+    info = client.ping()
+    assert info is not None
+    assert Path(daemon.pid_path()).read_text(encoding="utf-8") == str(info["pid"])
+    # The other daemons saw the lock taken and exited without touching the socket
+    log = ""
+    deadline = time.monotonic() + 10
+    while log.count("already running") < n - 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        log = Path(client.log_path()).read_text(encoding="utf-8")
+    assert log.count("already running") == n - 1, log
+    assert client.ping() == info
@@ -1,16 +1,85 @@
 from __future__ import annotations
 
 import asyncio
+import importlib.util
+import os
+import shutil
+import sys
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, AsyncIterator, cast
 
 import pytest
+import pytest_asyncio
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
 
-@pytest.mark.asyncio
-async def test_server_integration_std_io(tmp_path: Path) -> None:
+# All tests share one server process (and event loop) per module
+pytestmark = [pytest.mark.asyncio(loop_scope="module"), pytest.mark.xdist_group("integration"), pytest.mark.slow]
+
+# Same lookup order as the runner (executable, then `python -m pyright`), without spawning it
+_HAS_PYRIGHT = shutil.which("pyright") is not None or importlib.util.find_spec("pyright") is not None
+
+
+async def _own_session(
+    params: StdioServerParameters, ready: asyncio.Future[ClientSession], stop: asyncio.Event
+) -> None:
+    # anyio cancel scopes must be exited by the task that entered them, while pytest-asyncio
+    # runs fixture setup and teardown as separate tasks: one task owns the whole session.
+    try:
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                ready.set_result(session)
+                await stop.wait()
+    except BaseException as e:
+        if not ready.done():
+            ready.set_exception(e)
+            return
+        raise
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def mcp_session() -> AsyncIterator[ClientSession]:
+    # Spawn the server module directly with this interpreter (no console-script or Poetry
+    # wrapper); keep PATH/VIRTUAL_ENV so it finds pyright, and make src/ importable
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_PATH), env.get("PYTHONPATH")]))
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "pyright_mcp.server_main"],
+        env=env,
+    )
+
+    # Connect client over stdio once; tests exercise the tools on this session
+    ready: asyncio.Future[ClientSession] = asyncio.get_running_loop().create_future()
+    stop = asyncio.Event()
+    owner = asyncio.create_task(_own_session(server_params, ready, stop))
+    session = await ready
+    try:
+        yield session
+    finally:
+        stop.set()
+        await owner
+
+
+async def test_server_lists_tools(mcp_session: ClientSession) -> None:
+    tools = await mcp_session.list_tools()
+    tool_names = {t.name for t in tools.tools}
+    assert {"pyright_check", "pyright_version", "find_pyright_config"}.issubset(tool_names)
+
+
+async def test_server_version_tool(mcp_session: ClientSession) -> None:
+    ver = await mcp_session.call_tool("pyright_version", {})
+    assert hasattr(ver, "structuredContent")
+    assert ver.structuredContent is not None
+    v = cast(dict[str, Any], ver.structuredContent)
+    assert isinstance(v.get("version"), str)
+
+
+@pytest.mark.skipif(not _HAS_PYRIGHT, reason="pyright not available")
+async def test_server_integration_std_io(tmp_path: Path, mcp_session: ClientSession) -> None:
     # Create a tiny project with one file containing an error to exercise diagnostics
     proj = tmp_path / "proj"
     proj.mkdir()
@@ -18,39 +87,16 @@ async def test_server_integration_std_io(tmp_path: Path) -> None:
         "def f(x: int) -> int:\n    return 'not-int'\n", encoding="utf-8"
     )
 
-    # Spawn our server via installed console script (works with pipx or Poetry venv)
-    server_params = StdioServerParameters(
-        command="pyright-mcp-server",
-        args=[],
-        env={},
+    # Call check tool on our temporary project
+    res = await mcp_session.call_tool(
+        "pyright_check",
+        {"target": str(proj)},
     )
-
-    # Connect client over stdio and exercise the tools
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-
-            tools = await session.list_tools()
-            tool_names = {t.name for t in tools.tools}
-            assert {"pyright_check", "pyright_version", "find_pyright_config"}.issubset(tool_names)
-
-            # Call version tool
-            ver = await session.call_tool("pyright_version", {})
-            assert hasattr(ver, "structuredContent")
-            assert ver.structuredContent is not None
-            v = cast(dict[str, Any], ver.structuredContent)
-            assert isinstance(v.get("version"), str)
-
-            # Call check tool on our temporary project
-            res = await session.call_tool(
-                "pyright_check",
-                {"target": str(proj)},
-            )
-            assert hasattr(res, "structuredContent")
-            assert res.structuredContent is not None
-            payload = cast(dict[str, Any], res.structuredContent)
-            assert payload.get("pyright_version")
-            assert isinstance(payload.get("diagnostics"), list)
-            # Should have at least one error
-            assert payload["summary"]["error_count"] >= 1
-            assert any(d["severity"] == "error" for d in payload["diagnostics"])
\ No newline at end of file
+    assert hasattr(res, "structuredContent")
+    assert res.structuredContent is not None
+    payload = cast(dict[str, Any], res.structuredContent)
+    assert payload.get("pyright_version")
+    assert isinstance(payload.get("diagnostics"), list)
+    # Should have at least one error
+    assert payload["summary"]["error_count"] >= 1
+    assert any(d["severity"] == "error" for d in payload["diagnostics"])
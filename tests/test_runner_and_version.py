@@ -1,28 +1,21 @@
 import os
 import json
 import shutil
+import subprocess
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
 import pytest
-from pyright_mcp.runner import FailOn
+from pyright_mcp.runner import FailOn, PyrightRunner
 
 
 # Tests target the runner API that we'll implement in src/pyright_mcp/runner.py
 # The tests are designed to be fast and hermetic using temp dirs.
 
+_start_pos = itemgetter("line", "character")
 
-def write(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-
-
-@pytest.mark.parametrize("with_error", [False, True])
-def test_runner_basic(tmp_path: Path, with_error: bool) -> None:
-    # Arrange: create a tiny sample project
-    src = tmp_path / "proj"
-    src.mkdir()
-    code_ok = """
+_CODE_OK = """
 from __future__ import annotations
 
 def add(a: int, b: int) -> int:
@@ -31,7 +24,7 @@ def add(a: int, b: int) -> int:
 x = add(1, 2)
 """.strip()
 
-    code_err = """
+_CODE_ERR = """
 from __future__ import annotations
 
 def add(a: int, b: int) -> int:
@@ -40,24 +33,44 @@ def add(a: int, b: int) -> int:
 y: str = add(1, 2)  # type error on purpose
 """.strip()
 
-    write(src / "a.py", code_ok)
-    if with_error:
-        write(src / "b.py", code_err)
 
-    # Act
-    from pyright_mcp.runner import PyrightRunner, PyrightCheckParams
+def write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Raw fd write: no text-layer wrapper or buffer for these small payloads
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, content.encode("utf-8"))
+    finally:
+        os.close(fd)
 
-    runner = PyrightRunner()
-    params = PyrightCheckParams(
-        target=str(src),
-        cwd=None,
-        include=None,
-        exclude=None,
-        extra_args=None,
-        timeout_sec=60,
-        fail_on_severity="none",
-    )
-    result = runner.run_check(params)
+
+@pytest.mark.slow
+@pytest.mark.parametrize("with_error", [False, True])
+def test_runner_basic(tmp_path: Path, with_error: bool, pyright_runner: PyrightRunner, clean_project_result: Any) -> None:
+    if not with_error:
+        # The shared clean-project check covers the no-error case
+        result = clean_project_result
+    else:
+        # Arrange: create a tiny sample project
+        src = tmp_path / "proj"
+        src.mkdir()
+        write(src / "a.py", _CODE_OK)
+        write(src / "b.py", _CODE_ERR)
+
+        # Act
+        from pyright_mcp.runner import PyrightCheckParams
+
+        runner = pyright_runner
+        params = PyrightCheckParams(
+            target=str(src),
+            cwd=None,
+            include=None,
+            exclude=None,
+            extra_args=None,
+            timeout_sec=60,
+            fail_on_severity="none",
+        )
+        result = runner.run_check(params)
 
     # Assert summary fields exist and are ints
     summary = result["summary"]
@@ -75,11 +88,9 @@ y: str = add(1, 2)  # type error on purpose
     # Diagnostics determinism: sorted by (file, start.line, start.character)
     diags = result["diagnostics"]
     assert isinstance(diags, list)
-    sorted_diags = sorted(
-        diags,
-        key=lambda d: (d["file"], d["range"]["start"]["line"], d["range"]["start"]["character"]),
-    )
-    assert diags == sorted_diags
+    # A stable sort leaves diags unchanged iff their keys are already in order
+    keys = [(d["file"], *_start_pos(d["range"]["start"])) for d in diags]
+    assert keys == sorted(keys)
 
     # Severity normalization
     for d in diags:
@@ -97,16 +108,15 @@ y: str = add(1, 2)  # type error on purpose
         assert result["ok"] is True
 
 
-def test_include_exclude_filtering(tmp_path: Path) -> None:
+def test_include_exclude_filtering(tmp_path: Path, pyright_runner: PyrightRunner) -> None:
     # Arrange: create files where one should be excluded via pattern
     root = tmp_path / "proj2"
     root.mkdir()
     write(root / "included.py", "a: int = 1\n")
     write(root / "excluded.py", "b: str = 123  # error\n")
 
-    from pyright_mcp.runner import PyrightRunner, PyrightCheckParams
+    from pyright_mcp.runner import PyrightCheckParams
 
-    runner = PyrightRunner()
     params = PyrightCheckParams(
         target=str(root),
         cwd=None,
@@ -116,19 +126,17 @@ def test_include_exclude_filtering(tmp_path: Path) -> None:
         timeout_sec=60,
         fail_on_severity="none",
     )
-    result = runner.run_check(params)
-
-    # Expect no errors since excluded.py should be filtered out
-    assert result["summary"]["error_count"] == 0
-    assert all(d["file"].endswith("included.py") for d in result["diagnostics"])
+    # File selection happens before pyright runs; no subprocess needed
+    assert pyright_runner._select_files(params) == [os.path.realpath(root / "included.py")]
 
 
-def test_nonexistent_target_returns_helpful_error(tmp_path: Path) -> None:
+@pytest.mark.slow
+def test_nonexistent_target_returns_helpful_error(tmp_path: Path, pyright_runner: PyrightRunner) -> None:
     missing = tmp_path / "nope" / "missing.py"
 
-    from pyright_mcp.runner import PyrightRunner, PyrightCheckParams
+    from pyright_mcp.runner import PyrightCheckParams
 
-    runner = PyrightRunner()
+    runner = pyright_runner
     params = PyrightCheckParams(
         target=str(missing),
         cwd=None,
@@ -152,6 +160,17 @@ def test_parse_json_failure_yields_actionable_error() -> None:
     assert parsed is None  # signifies failure
 
 
+def test_parse_json_accepts_raw_bytes(pyright_output_bytes: bytes) -> None:
+    from pyright_mcp.runner import parse_pyright_json
+
+    parsed = parse_pyright_json(pyright_output_bytes)
+    assert parsed is not None and parsed["version"] == "1.1.414"
+    assert len(parsed["generalDiagnostics"]) == 5
+    assert parse_pyright_json(pyright_output_bytes.decode("utf-8")) == parsed
+    assert parse_pyright_json(b"\xff\xfe not json") is None
+
+
+@pytest.mark.slow
 def test_pyright_version_available() -> None:
     from pyright_mcp.runner import get_pyright_version
 
@@ -162,43 +181,38 @@ def test_pyright_version_available() -> None:
     assert ver["supports_outputjson"] is True
 
 
+_ALL_SEVERITIES = frozenset({"error", "warning", "information"})
+
+
 @pytest.mark.parametrize(
-    "threshold,expect_ok",
+    "threshold,kept,expect_ok",
     [
-        ("none", True),
-        ("information", True),  # any info or higher will flip ok if diagnostics exist
-        ("warning", True),       # no warnings in clean file
-        ("error", True),         # no errors in clean file
+        ("none", _ALL_SEVERITIES, True),
+        ("information", _ALL_SEVERITIES, False),
+        ("warning", _ALL_SEVERITIES, False),
+        ("error", _ALL_SEVERITIES, False),
+        ("error", frozenset({"warning", "information"}), True),  # no errors left
+        ("warning", frozenset({"information"}), True),  # only information left
     ],
 )
-def test_fail_on_severity_threshold(tmp_path: Path, threshold: FailOn, expect_ok: bool) -> None:
-    # Use a file that produces information-level diagnostics (often none by default).
-    # We'll ensure behavior is deterministic: if no diagnostics, ok remains True.
-    root = tmp_path / "proj3"
-    root.mkdir()
-    write(root / "c.py", "z = 1\n")
-
-    from pyright_mcp.runner import PyrightRunner, PyrightCheckParams
-
-    runner = PyrightRunner()
-    params = PyrightCheckParams(
-        target=str(root),
-        cwd=None,
-        include=None,
-        exclude=None,
-        extra_args=None,
-        timeout_sec=60,
-        fail_on_severity=threshold,
-    )
-    result = runner.run_check(params)
-
-    # If there are no diagnostics at or above threshold, ok True; otherwise False
-    assert isinstance(result["ok"], bool)
-    if threshold == "information" and len(result["diagnostics"]) > 0:
-        # If any diagnostics exist, information threshold will flip ok to False
-        assert result["ok"] is False
+def test_fail_on_severity_threshold(
+    pyright_output_bytes: bytes, threshold: FailOn, kept: frozenset[str], expect_ok: bool
+) -> None:
+    from pyright_mcp.runner import _compute_threshold_ok, _normalize_diag, parse_pyright_json
+
+    # The threshold is pure post-processing: apply it to the recorded report's diagnostics
+    report = parse_pyright_json(pyright_output_bytes)
+    assert report is not None
+    diags = [_normalize_diag(d)[1] for d in report["generalDiagnostics"]]
+    diags = [d for d in diags if d["severity"] in kept]
+    assert {d["severity"] for d in diags} == kept
+
+    ok, reason = _compute_threshold_ok(diags, threshold)
+    assert ok is expect_ok
+    if expect_ok:
+        assert reason is None
     else:
-        assert result["ok"] is expect_ok
+        assert reason and threshold in reason
 
 
 def test_pyright_not_found_error_message(monkeypatch) -> None:
@@ -212,8 +226,129 @@ def test_pyright_not_found_error_message(monkeypatch) -> None:
         raise FileNotFoundError("pyright not available")
 
     monkeypatch.setattr(r.subprocess, "run", fake_run)
+    # Drop the executable/version cached by earlier tests so the patched lookups are used
+    r.invalidate_cache()
 
     info = r.get_pyright_version()
     assert info["version"] == ""
     assert info["executable_path"] == ""
-    assert info["supports_outputjson"] is False
\ No newline at end of file
+    assert info["supports_outputjson"] is False
+
+def test_run_check_normalizes_canned_report(tmp_path: Path, monkeypatch, pyright_output_bytes: bytes) -> None:
+    # Fake the subprocess boundary once: run_check parses and normalizes a recorded report
+    from pyright_mcp import runner as r
+
+    root = tmp_path / "canned"
+    write(root / "m.py", "pass\n")
+
+    def fake_run(cmd: list[str], cwd: str, timeout_sec: int) -> subprocess.CompletedProcess[bytes]:
+        return subprocess.CompletedProcess(cmd, 1, pyright_output_bytes, b"")
+
+    monkeypatch.setattr(r, "_run_pyright", fake_run)
+    # No pyright lookup or `pyright --version` probe; the report's own version wins
+    stub_version = r.VersionInfo(version="0.0.0", executable_path="pyright", supports_outputjson=True)
+    monkeypatch.setattr(r, "_build_pyright_argv", lambda: (["pyright"], "pyright"))
+    monkeypatch.setattr(r, "get_pyright_version", lambda: stub_version)
+    runner = PyrightRunner(use_daemon=False, use_watch=False)
+    result = runner.run_check(r.PyrightCheckParams(target=str(root), fail_on_severity="warning"))
+
+    assert result["pyright_version"] == "1.1.414"
+    assert result["exit_code"] == 1
+    assert result["summary"] == {
+        "files_analyzed": 2,
+        "error_count": 2,
+        "warning_count": 2,
+        "information_count": 1,
+        "time_sec": 0.838,
+    }
+    diags = result["diagnostics"]
+    assert [(Path(d["file"]).name, d["range"]["start"]["line"], d["severity_level"]) for d in diags] == [
+        ("main.py", 3, 2),
+        ("main.py", 4, 3),
+        ("main.py", 4, 2),
+        ("mod.py", 4, 3),
+        ("mod.py", 5, 1),
+    ]
+    assert diags[1].get("rule") == "reportUndefinedVariable"
+    assert diags[4].get("rule") is None
+    assert result["ok"] is False
+
+
+def test_shard_paths_round_robin() -> None:
+    from pyright_mcp.runner import _shard_paths
+
+    paths = [f"f{i}.py" for i in range(10)]
+    assert _shard_paths(paths[:7], workers=4) == [paths[:7]]  # too few to shard
+    assert _shard_paths(paths, workers=1) == [paths]
+    shards = _shard_paths(paths, workers=8)  # capped so each shard gets enough files
+    assert shards == [paths[0::2], paths[1::2]]
+
+
+@pytest.mark.slow
+def test_sharded_run_matches_single_process(tmp_path: Path, pyright_runner: PyrightRunner) -> None:
+    root = tmp_path / "proj4"
+    for i in range(8):
+        write(root / f"m{i}.py", f"v{i}: str = {i}  # error\n")
+
+    from pyright_mcp.runner import PyrightCheckParams
+
+    runner = pyright_runner
+    single = runner.run_check(PyrightCheckParams(target=str(root), include=["*.py"], workers=1))
+    sharded = runner.run_check(PyrightCheckParams(target=str(root), include=["*.py"], workers=2))
+
+    assert sharded["summary"]["error_count"] == single["summary"]["error_count"] == 8
+    assert sharded["summary"]["files_analyzed"] == single["summary"]["files_analyzed"]
+    assert sharded["diagnostics"] == single["diagnostics"]
+    assert sharded["exit_code"] == single["exit_code"] == 1
+
+
+@pytest.mark.slow
+def test_pyright_version_is_cached(monkeypatch) -> None:
+    from pyright_mcp import runner as r
+
+    r.invalidate_cache()
+    first = r.get_pyright_version()
+    assert first["version"]
+
+    def fail_run(*args: Any, **kwargs: Any):
+        raise AssertionError("pyright --version should not be re-probed")
+
+    monkeypatch.setattr(r.subprocess, "run", fail_run)
+    monkeypatch.setattr(r.shutil, "which", fail_run)
+    assert r.get_pyright_version() == first
+
+    # A changed PATH means a different pyright may be picked up: probe again
+    monkeypatch.undo()
+    monkeypatch.setenv("PATH", os.environ.get("PATH", "") + os.pathsep + "/nonexistent")
+    assert r.get_pyright_version() == first
+    assert r._probe_pyright_version.cache_info().misses >= 2
+
+
+def test_iter_included_paths_prunes_excluded_dirs(tmp_path: Path) -> None:
+    from pyright_mcp.runner import _iter_included_paths
+
+    root = tmp_path / "proj5"
+    for rel in ["a.py", "pkg/b.py", "pkg/deep/c.py", "pkg/notes.md", "node_modules/x/d.py", "build/e.py"]:
+        write(root / rel, "v = 1\n")
+
+    def rels(paths: list[str]) -> list[str]:
+        return sorted(Path(p).relative_to(root.resolve()).as_posix() for p in paths)
+
+    # '**' spans zero or more directories; '*' stays within one component
+    assert rels(_iter_included_paths(root, ["**/*.py"], None)) == [
+        "a.py", "build/e.py", "node_modules/x/d.py", "pkg/b.py", "pkg/deep/c.py"
+    ]
+    assert rels(_iter_included_paths(root, ["*.py"], None)) == ["a.py"]
+    # A matched directory contributes every file below it
+    assert rels(_iter_included_paths(root, ["pkg"], ["*.md"])) == ["pkg/b.py", "pkg/deep/c.py"]
+    # Directories matching an exclude (by name or relative path) are pruned as a whole
+    assert rels(_iter_included_paths(root, ["**/*.py"], ["node_modules", "build/*", "pkg/deep"])) == [
+        "a.py", "pkg/b.py"
+    ]
+    # Repeated '**' matches like a single one
+    assert _iter_included_paths(root, ["**/**/**/*.py"], None) == _iter_included_paths(root, ["**/*.py"], None)
+    # '..' components are resolved: one spelling per file, also outside the root
+    write(tmp_path / "shared" / "s.py", "v = 1\n")
+    assert _iter_included_paths(root, ["../shared/*.py"], None) == [str((tmp_path / "shared" / "s.py").resolve())]
+    assert rels(_iter_included_paths(root, ["pkg/*.py", "pkg/../pkg/*.py"], None)) == ["pkg/b.py"]
+    assert rels(_iter_included_paths(root, ["pkg/../pkg/*.py"], ["pkg/b.py"])) == []
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from pyright_mcp import watch
+from pyright_mcp.runner import PyrightCheckParams, PyrightRunner
+
+SRC_PATH = Path(__file__).resolve().parents[1] / "src"
+
+# Starts a watch session, reports its process group, then serves MCP over stdio
+_HOST_SCRIPT = """
+import sys
+from pyright_mcp import server_main, watch
+from pyright_mcp.runner import PyrightCheckParams, PyrightRunner
+
+PyrightRunner(use_daemon=False, use_watch=True).run_check(PyrightCheckParams(target=sys.argv[1]))
+print(*[s.proc.pid for s in watch._SESSIONS.values()], flush=True)
+server_main.main()
+"""
+
+
+@pytest.fixture
+def watched_runner():
+    yield PyrightRunner(use_daemon=False, use_watch=True)
+    watch.close_all()
+
+
+@pytest.mark.slow
+def test_watch_session_tracks_edits_and_deletions(tmp_path: Path, watched_runner: PyrightRunner) -> None:
+    proj = tmp_path / "proj"
+    proj.mkdir()
+    (proj / "a.py").write_text("x: int = 'oops'\n", encoding="utf-8")
+    params = PyrightCheckParams(target=str(proj))
+    one_shot = PyrightRunner(use_daemon=False, use_watch=False)
+
+    first = watched_runner.run_check(params)
+    assert first["summary"]["error_count"] == 1
+    assert first["exit_code"] == 1
+    assert len(watch._SESSIONS) == 1
+
+    # Unchanged workspace: answered from the running session
+    assert watched_runner.run_check(params)["diagnostics"] == first["diagnostics"]
+
+    (proj / "a.py").write_text("x: int = 1\n", encoding="utf-8")
+    (proj / "b.py").write_text("y: str = 1\n", encoding="utf-8")
+    edited = watched_runner.run_check(params)
+    assert edited["diagnostics"] == one_shot.run_check(params)["diagnostics"]
+    assert [Path(d["file"]).name for d in edited["diagnostics"]] == ["b.py"]
+
+    (proj / "b.py").unlink()
+    deleted = watched_runner.run_check(params)
+    assert deleted["ok"] is True
+    assert deleted["diagnostics"] == []
+    assert deleted["exit_code"] == 0
+
+
+@pytest.mark.slow
+def test_watch_session_sees_imported_module_edits(tmp_path: Path, watched_runner: PyrightRunner) -> None:
+    proj = tmp_path / "proj"
+    proj.mkdir()
+    (proj / "b.py").write_text("def f() -> int:\n    return 1\n", encoding="utf-8")
+    (proj / "a.py").write_text("from b import f\n\nx: int = f()\n", encoding="utf-8")
+    # Only a.py is checked (and watched by pyright); b.py is imported
+    params = PyrightCheckParams(target=str(proj / "a.py"))
+
+    assert watched_runner.run_check(params)["summary"]["error_count"] == 0
+    (proj / "b.py").write_text("def f() -> str:\n    return ''\n", encoding="utf-8")
+    assert watched_runner.run_check(params)["summary"]["error_count"] == 1
+
+
+def test_scan_sources_splits_watched_and_other_changes(tmp_path: Path) -> None:
+    proj = tmp_path / "proj"
+    for rel in ["a.py", "pkg/b.py", "lib/c.py", ".hidden/d.py", "venv/lib/e.py", "notes.md"]:
+        (proj / rel).parent.mkdir(parents=True, exist_ok=True)
+        (proj / rel).write_text("", encoding="utf-8")
+    (proj / "venv" / "pyvenv.cfg").write_text("", encoding="utf-8")
+    for root, dirs, files in os.walk(proj):
+        for name in dirs + files:
+            os.utime(os.path.join(root, name), (100.5, 100.5))
+    os.utime(proj, (100.5, 100.5))
+    paths = [str(proj / "a.py"), str(proj / "pkg")]
+
+    assert watch._scan_sources(str(proj), paths) == (100.5, 100.5, 3, False)
+    os.utime(proj / "pkg" / "b.py", (200.5, 200.5))
+    assert watch._scan_sources(str(proj), paths) == (200.5, 100.5, 3, False)
+    # Imported modules elsewhere under the analysis root count as other changes
+    os.utime(proj / "lib" / "c.py", (300.5, 300.5))
+    assert watch._scan_sources(str(proj), paths) == (200.5, 300.5, 3, False)
+    # Hidden directories, virtual environments and non-Python files are ignored
+    for rel in [".hidden/d.py", "venv/lib/e.py", "notes.md"]:
+        os.utime(proj / rel, (400.0, 400.0))
+    assert watch._scan_sources(str(proj), paths) == (200.5, 300.5, 3, False)
+    # A whole-second mtime marks the timestamps as coarse
+    os.utime(proj / "a.py", (150.0, 150.0))
+    assert watch._scan_sources(str(proj), paths) == (200.5, 300.5, 3, True)
+
+
+@pytest.mark.slow
+def test_server_sigterm_stops_watch_sessions(tmp_path: Path) -> None:
+    (tmp_path / "a.py").write_text("x: int = 1\n", encoding="utf-8")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_PATH), os.environ.get("PYTHONPATH")])))
+    host = subprocess.Popen(
+        [sys.executable, "-c", _HOST_SCRIPT, str(tmp_path)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    try:
+        assert host.stdout is not None
+        pgids = [int(p) for p in host.stdout.readline().split()]
+        assert len(pgids) == 1
+        os.killpg(pgids[0], 0)  # the watch process group is alive
+
+        host.send_signal(signal.SIGTERM)
+        assert host.wait(timeout=30) == -signal.SIGTERM
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                os.killpg(pgids[0], 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("watch processes outlived the server")
+    finally:
+        host.kill()
+        host.wait()